@@ -0,0 +1,297 @@
+"""In-memory model of the committee hierarchy as consumed by streamlit_tree_select."""
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import cached_property
+
+from models import Committee
+
+
+@dataclass(frozen=True)
+class CommitteeChange:
+    """
+    A change to one committee node, see MeddbData.get_committee_changes.
+    kind is 'created' or 'updated', with name and type_name, 'moved', with the new parent_id, or 'deleted', which removes the node and its subtree.
+    """
+    kind: str
+    committee_id: int
+    name: str | None = None
+    type_name: str | None = None
+    parent_id: int | None = None
+
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _sort_key(node: dict) -> tuple[int, str]:
+    """Sort key putting parents before leaves, then sorting alphabetically by label."""
+    return 0 if node.get("children") else 1, node["label"]
+
+
+class CommitteeTree:
+    """
+    Snapshot of the committee hierarchy tagged with the data version it was built from.
+    Instances are shared between Streamlit sessions and must be treated as read-only by callers.
+    """
+    def __init__(self, roots: list[dict], parent_map: dict[int, int | None], node_map: dict[int, dict], version: int):
+        """
+        Initialize the tree snapshot.
+
+        :param roots: Sorted root nodes, each node holding its sorted children.
+        :type roots: list[dict]
+        :param parent_map: Mapping from committee ID to parent committee ID.
+        :type parent_map: dict[int, int | None]
+        :param node_map: Mapping from committee ID to its node.
+        :type node_map: dict[int, dict]
+        :param version: Data version the snapshot was built from.
+        :type version: int
+        """
+        self.roots = roots
+        self.parent_map = parent_map
+        self.node_map = node_map
+        self.version = version
+
+    @classmethod
+    def from_committees(cls, committees: list[Committee], version: int) -> "CommitteeTree":
+        """Build a tree snapshot from committees with their types loaded."""
+        node_map: dict[int, dict] = {}
+        parent_map: dict[int, int | None] = {}
+
+        for c in committees:
+            node_map[c.id] = {
+                "label": c.name,
+                "value": c.id,
+                "className": c.type.name if c.type else None,
+            }
+            parent_map[c.id] = c.parent_id
+
+        roots = []
+        for c in committees:
+            if c.parent_id is None:
+                roots.append(node_map[c.id])
+            else:
+                parent_node = node_map.get(c.parent_id)
+                if parent_node:
+                    parent_node.setdefault("children", []).append(node_map[c.id])
+
+        def sort_nodes(nodes: list[dict]) -> list[dict]:
+            """Sort nodes so that parents come before children, and alphabetically by label."""
+            nodes.sort(key=_sort_key)
+            for node in nodes:
+                children = node.get("children")
+                if children:
+                    sort_nodes(children)
+            return nodes
+
+        return cls(roots=sort_nodes(roots), parent_map=parent_map, node_map=node_map, version=version)
+
+    @cached_property
+    def search_index(self) -> "CommitteeSearchIndex":
+        """Name index of the committees in the tree, built on first use. Each version of the tree is a new snapshot, so the index never goes stale."""
+        return CommitteeSearchIndex(self.roots)
+
+    def apply_changes(self, changes: list[CommitteeChange], version: int) -> "CommitteeTree":
+        """
+        Return a new snapshot with changes applied, leaving this one untouched for sessions still reading it.
+        Only the changed nodes and their ancestors are copied and no list is re-sorted, so a change costs O(depth + siblings) instead of a full rebuild,
+        apart from copying the flat node and parent maps. Changes are idempotent, e.g. a created node that is already present is replaced.
+        """
+        tree = CommitteeTree(roots=list(self.roots), parent_map=dict(self.parent_map), node_map=dict(self.node_map), version=version)
+        copied: set[int] = set()
+        for change in changes:
+            tree._apply_change(change, copied)
+        return tree
+
+    def _apply_change(self, change: CommitteeChange, copied: set[int]) -> None:
+        committee_id = change.committee_id
+        if change.kind == "created":
+            if committee_id in self.node_map:
+                self._remove(committee_id, copied)
+            node = {"label": change.name, "value": committee_id, "className": change.type_name}
+            self.node_map[committee_id] = node
+            self.parent_map[committee_id] = change.parent_id
+            copied.add(committee_id)
+            self._insert(node, change.parent_id, copied)
+        elif committee_id not in self.node_map:
+            return
+        elif change.kind == "updated":
+            node = self._own(committee_id, copied)
+            node["label"] = change.name
+            node["className"] = change.type_name
+            self._reposition(committee_id, copied)
+        elif change.kind == "moved":
+            node = self._own(committee_id, copied)
+            self._detach(committee_id, copied)
+            self.parent_map[committee_id] = change.parent_id
+            self._insert(node, change.parent_id, copied)
+        elif change.kind == "deleted":
+            self._remove(committee_id, copied)
+        else:
+            raise ValueError(f"Unknown committee change: {change.kind}")
+
+    def _siblings(self, committee_id: int, copied: set[int]) -> list[dict] | None:
+        """The list holding a node, copied for this snapshot, or None if the node's parent is missing and the node is not shown."""
+        parent_id = self.parent_map.get(committee_id)
+        if parent_id is None:
+            return self.roots
+        if parent_id not in self.node_map:
+            return None
+        return self._own(parent_id, copied).setdefault("children", [])
+
+    def _own(self, committee_id: int, copied: set[int]) -> dict:
+        """Return the node for this snapshot to modify, copying it and, recursively, its ancestors unless already copied."""
+        node = self.node_map[committee_id]
+        if committee_id in copied:
+            return node
+        siblings = self._siblings(committee_id, copied)
+        copy = dict(node)
+        if "children" in copy:
+            copy["children"] = list(copy["children"])
+        if siblings is not None:
+            index = next((i for i, sibling in enumerate(siblings) if sibling is node), None)
+            if index is not None:
+                siblings[index] = copy
+        self.node_map[committee_id] = copy
+        copied.add(committee_id)
+        return copy
+
+    def _detach(self, committee_id: int, copied: set[int]) -> None:
+        """Take a node out of its parent's children, keeping it in the maps."""
+        siblings = self._siblings(committee_id, copied)
+        if siblings is None:
+            return
+        node = self.node_map[committee_id]
+        siblings[:] = [sibling for sibling in siblings if sibling is not node]
+        parent_id = self.parent_map.get(committee_id)
+        if parent_id is not None and not siblings:
+            # A parent that became a leaf sorts after its siblings with children
+            del self.node_map[parent_id]["children"]
+            self._reposition(parent_id, copied)
+
+    def _insert(self, node: dict, parent_id: int | None, copied: set[int]) -> None:
+        """Insert a node at its sorted position among the children of parent_id, or the roots."""
+        if parent_id is not None and parent_id not in self.node_map:
+            return
+        was_leaf = parent_id is not None and not self.node_map[parent_id].get("children")
+        siblings = self.roots if parent_id is None else self._own(parent_id, copied).setdefault("children", [])
+        bisect.insort(siblings, node, key=_sort_key)
+        if was_leaf:
+            self._reposition(parent_id, copied)
+
+    def _reposition(self, committee_id: int, copied: set[int]) -> None:
+        """Move a node whose sort key changed to its sorted position among its siblings."""
+        siblings = self._siblings(committee_id, copied)
+        if siblings is None:
+            return
+        node = self.node_map[committee_id]
+        siblings[:] = [sibling for sibling in siblings if sibling is not node]
+        bisect.insort(siblings, node, key=_sort_key)
+
+    def _remove(self, committee_id: int, copied: set[int]) -> None:
+        """Remove a node and its subtree from the tree and the maps."""
+        self._detach(committee_id, copied)
+        stack = [self.node_map[committee_id]]
+        while stack:
+            node = stack.pop()
+            self.node_map.pop(node["value"], None)
+            self.parent_map.pop(node["value"], None)
+            stack.extend(node.get("children", []))
+
+
+class CommitteeSearchIndex:
+    """
+    Index for searching committee names. Names are compared NFC-normalized and casefolded, so e.g. a decomposed "å" or "Æ" match as expected.
+    A committee matches if the query occurs in its name, or if every word of the query is the start of a word in the name, in any order.
+    """
+    def __init__(self, roots: list[dict]):
+        """
+        Build the index from the nodes of a committee tree.
+
+        :param roots: Root nodes of the tree, each node holding its children.
+        :type roots: list[dict]
+        """
+        self._nodes: dict[int, dict] = {}
+        self._labels: dict[int, str] = {}
+        word_ids: dict[str, set[int]] = {}
+        self._trigram_ids: dict[str, set[int]] = {}
+
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            stack.extend(node.get("children", []))
+            committee_id = node["value"]
+            label = self.normalize(node["label"])
+            self._nodes[committee_id] = node
+            self._labels[committee_id] = label
+            for word in _WORD_PATTERN.findall(label):
+                word_ids.setdefault(word, set()).add(committee_id)
+            for i in range(len(label) - 2):
+                self._trigram_ids.setdefault(label[i:i + 3], set()).add(committee_id)
+
+        # Sorted words, so the words starting with a prefix are a contiguous range found by bisection
+        self._words = sorted(word_ids)
+        self._word_ids = word_ids
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text for comparison: NFC, casefolded and with whitespace collapsed."""
+        return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+    def search(self, query: str) -> list[dict]:
+        """
+        Find committees matching query, best matches first: exact names, names starting with the query, names with words starting with the query
+        words, those starting with the first query word before the others, and then names containing the query elsewhere. Ties are sorted by name.
+
+        :param query: Text to search for.
+        :type query: str
+        :return: Matching tree nodes, shared with the tree and read-only.
+        :rtype: list[dict]
+        """
+        query = self.normalize(query)
+        if not query:
+            return []
+
+        matches = self._containing(query)
+        words = _WORD_PATTERN.findall(query)
+        word_matches = self._with_word_prefixes(words) if words else set()
+
+        def rank(committee_id: int) -> tuple[int, str]:
+            label = self._labels[committee_id]
+            if label == query:
+                return 0, label
+            if label.startswith(query):
+                return 1, label
+            if committee_id in word_matches:
+                return (2 if label.startswith(words[0]) else 3), label
+            return 4, label
+
+        return [self._nodes[committee_id] for committee_id in sorted(matches | word_matches, key=lambda committee_id: (*rank(committee_id), committee_id))]
+
+    def _containing(self, query: str) -> set[int]:
+        """IDs of the committees whose name contains query."""
+        if len(query) < 3:
+            return {committee_id for committee_id, label in self._labels.items() if query in label}
+        # Every trigram of the query occurs in a matching name, so the smallest trigram sets bound the candidates
+        trigram_sets = sorted((self._trigram_ids.get(query[i:i + 3], set()) for i in range(len(query) - 2)), key=len)
+        candidates = set(trigram_sets[0])
+        for ids in trigram_sets[1:]:
+            if not candidates:
+                break
+            candidates &= ids
+        return {committee_id for committee_id in candidates if query in self._labels[committee_id]}
+
+    def _with_word_prefixes(self, prefixes: list[str]) -> set[int]:
+        """IDs of the committees where each prefix starts a word of the name."""
+        result = None
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            ids = set()
+            for i in range(bisect.bisect_left(self._words, prefix), len(self._words)):
+                word = self._words[i]
+                if not word.startswith(prefix):
+                    break
+                ids |= self._word_ids[word]
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result or set()
@@ -1,10 +1,17 @@
 # Uncommented handling phone and mobile phone numbers - but keeping it in file, as might be needed later
+import json
 import logging
+import time
 
 from utils.api_requests import APIClient
-from utils.config import DELTA_AUTH_URL, DELTA_CLIENT_ID, DELTA_CLIENT_SECRET, DELTA_REALM, DELTA_URL
+from utils.cache import TTLCache
+from utils.config import DELTA_AUTH_URL, DELTA_CLIENT_ID, DELTA_CLIENT_SECRET, DELTA_POOL_SIZE, DELTA_REALM, DELTA_SEARCH_CACHE_SIZE, DELTA_SEARCH_CACHE_TTL, DELTA_TIMEOUT, DELTA_URL
+from utils.metrics import DELTA_SEARCH_SECONDS
 logger = logging.getLogger(__name__)
 
+# Stands in for the criteria list in the serialized search template
+_CRITERIA_PLACEHOLDER = "__CRITERIA__"
+
 
 class DeltaClient(APIClient):
     """
@@ -12,9 +19,12 @@ class DeltaClient(APIClient):
     Phone and mobile attributes are currently not used, but can be enabled if needed.
     """
     def __init__(self):
-        """Initialize the DeltaClient with necessary authentication parameters and base search structure."""
-        super().__init__(base_url=DELTA_URL, auth_url=DELTA_AUTH_URL, realm=DELTA_REALM, client_id=DELTA_CLIENT_ID, client_secret=DELTA_CLIENT_SECRET, add_auth_to_path=False)
-        self.base_search_dict = {
+        """Initialize the DeltaClient with necessary authentication parameters and the serialized base search template."""
+        super().__init__(base_url=DELTA_URL, auth_url=DELTA_AUTH_URL, realm=DELTA_REALM, client_id=DELTA_CLIENT_ID, client_secret=DELTA_CLIENT_SECRET, add_auth_to_path=False,
+                         pool_size=DELTA_POOL_SIZE, timeout=DELTA_TIMEOUT)
+        # Shared by all sessions using the cached client, repeated searches within the TTL skip the API call
+        self.search_cache = TTLCache(maxsize=DELTA_SEARCH_CACHE_SIZE, ttl=DELTA_SEARCH_CACHE_TTL)
+        base_search_dict = {
             "graphQueries": [
                 {
                     "computeAvailablePages": True,
@@ -61,7 +71,7 @@ class DeltaClient(APIClient):
                         },
                         "criteria": {
                             "type": "AND",
-                            "criteria": []
+                            "criteria": _CRITERIA_PLACEHOLDER
                         },
                         "projection": {
                             "identity": True,
@@ -109,11 +119,48 @@ class DeltaClient(APIClient):
             ]
         }
 
-    def search(self, search_name: str = None, email: str = None, username: str = None) -> list[dict]:
+        # Serialized once; searches only splice in their criteria, so the template is never mutated and is safe to share between sessions
+        head, tail = json.dumps(base_search_dict).split(json.dumps(_CRITERIA_PLACEHOLDER))
+        self._search_template = (head, tail)
+
+    def _build_search_body(self, criteria: list[dict]) -> str:
+        """Build the JSON body of a graph query search with the given criteria from the pre-serialized template."""
+        head, tail = self._search_template
+        return head + json.dumps(criteria) + tail
+
+    @staticmethod
+    def _normalize_search_value(value: str | None) -> str | None:
+        """Strip surrounding whitespace from a search parameter, treating empty values as not given."""
+        return (value.strip() or None) if value else None
+
+    def clear_search_cache(self) -> None:
+        """Remove all cached search results, e.g. after persons have been changed in Delta."""
+        self.search_cache.clear()
+
+    def search(self, search_name: str = None, email: str = None, username: str = None, timeout: float | None = None) -> list[dict]:
         """
         Search for persons in the Delta system by name, email, or username.
+        Surrounding whitespace is stripped from the parameters. Results are cached for DELTA_SEARCH_CACHE_TTL seconds, keyed on the stripped parameters,
+        which are also the ones sent to Delta, so a cache entry always holds the results of its own query.
+        timeout overrides the client's request timeout in seconds, e.g. to give up on Delta no later than a caller waiting for the result.
         Returns a list of dictionaries with keys: 'Brugernavn', 'Navn', 'E-mail', 'Afdeling'.
         """
+        started = time.perf_counter()
+        search_name, email, username = (self._normalize_search_value(value) for value in (search_name, email, username))
+        cache_key = (search_name, email, username)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            DELTA_SEARCH_SECONDS.labels(cache="hit").observe(time.perf_counter() - started)
+            # Copies, as callers extend and keep the returned list
+            return [dict(r) for r in cached]
+
+        try:
+            return self._search_uncached(cache_key, search_name=search_name, email=email, username=username, timeout=timeout)
+        finally:
+            DELTA_SEARCH_SECONDS.labels(cache="miss").observe(time.perf_counter() - started)
+
+    def _search_uncached(self, cache_key: tuple, search_name: str | None, email: str | None, username: str | None, timeout: float | None = None) -> list[dict]:
+        """Query Delta and store the results in the search cache under cache_key, see search."""
         criteria = []
         if search_name:
             criteria.append({
@@ -158,9 +205,8 @@ class DeltaClient(APIClient):
             })
 
         if criteria:
-            query = self.base_search_dict.copy()
-            query['graphQueries'][0]['graphQuery']['criteria']['criteria'] = criteria
-            response = self.make_request(method='POST', path='api/object/graph-query', json=query)
+            response = self.make_request(method='POST', path='api/object/graph-query', data=self._build_search_body(criteria), headers={'Content-Type': 'application/json'},
+                                         timeout=timeout if timeout is not None else self.timeout)
             results = []
             try:
                 instances = response.get("graphQueryResult", [])[0].get("instances", [])
@@ -205,6 +251,7 @@ class DeltaClient(APIClient):
                     # "Mobil": mobile if mobile is not None else '-',
                     "Brugernavn": username if username is not None else '-'
                 })
-            return results
+            self.search_cache.set(cache_key, results)
+            return [dict(r) for r in results]
         else:
             raise ValueError("At least one search parameter (name, email, username) must be provided.")
@@ -0,0 +1,96 @@
+"""Excel export helpers. Large exports are streamed to disk instead of being built in memory."""
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from io import BytesIO
+
+import xlsxwriter
+
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "meddb-exports")
+EXPORT_MAX_AGE = 24 * 60 * 60  # seconds before abandoned export files are removed
+
+
+def write_rows_to_excel(path: str | BytesIO, sheet_name: str, columns: list[str], rows: Iterable[list]) -> int:
+    """
+    Write rows to an Excel file, one row at a time, using xlsxwriter's constant_memory mode when writing to a file.
+    Column widths are tracked while writing and set to at least the length of the column name + 2.
+
+    :param path: File path of the workbook to create, or a buffer for small workbooks built in memory.
+    :type path: str | BytesIO
+    :param sheet_name: Name of the worksheet.
+    :type sheet_name: str
+    :param columns: Column names written as the header row.
+    :type columns: list[str]
+    :param rows: Row values in the same order as columns. Can be a generator.
+    :type rows: Iterable[list]
+    :return: Number of rows written, excluding the header.
+    :rtype: int
+    """
+    widths = [len(col) for col in columns]
+    row_count = 0
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True} if isinstance(path, str) else {'in_memory': True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, columns)
+        for row_count, row in enumerate(rows, start=1):
+            worksheet.write_row(row_count, 0, row)
+            for idx, value in enumerate(row):
+                if value is not None:
+                    widths[idx] = max(widths[idx], len(str(value)))
+
+        for idx, width in enumerate(widths):
+            worksheet.set_column(idx, idx, width + 2)
+    finally:
+        workbook.close()
+
+    return row_count
+
+
+def create_excel_bytes(sheet_name: str, columns: list[str], rows: Iterable[list]) -> bytes:
+    """Build a small Excel file in memory, see write_rows_to_excel."""
+    buffer = BytesIO()
+    write_rows_to_excel(path=buffer, sheet_name=sheet_name, columns=columns, rows=rows)
+    return buffer.getvalue()
+
+
+def create_export_file(sheet_name: str, columns: list[str], rows: Iterable[list]) -> str | None:
+    """
+    Stream rows into a new Excel file in EXPORT_DIR, see write_rows_to_excel.
+    Returns the file path, or None (and no file) if there were no rows. The caller owns the file and should remove it with remove_export_file.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _remove_old_export_files()
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx", dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        row_count = write_rows_to_excel(path=path, sheet_name=sheet_name, columns=columns, rows=rows)
+    except Exception:
+        remove_export_file(path)
+        raise
+
+    if row_count == 0:
+        remove_export_file(path)
+        return None
+    return path
+
+
+def remove_export_file(path: str | None) -> None:
+    """Remove an export file if it exists."""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def _remove_old_export_files() -> None:
+    """Remove export files older than EXPORT_MAX_AGE, left behind by sessions that ended without cleaning up."""
+    cutoff = time.time() - EXPORT_MAX_AGE
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
@@ -1,5 +1,7 @@
 import streamlit as st
 
+from utils.config import ROOT_COMMITTEE_ID
+
 
 # CREATE/ADD forms
 def create_form(type_name: str, create_func: callable) -> None:
@@ -21,26 +23,24 @@ def create_form(type_name: str, create_func: callable) -> None:
 def create_committee_form(get_all_func: callable, get_all_types_func: callable, create_func: callable) -> None:
     """Create a form for adding a new committee."""
     with st.form("add_udvalg_form", clear_on_submit=True):
-        parent_options = [(item.id, item.name) for item in get_all_func()]
-        parent_options.append((None, "Ingen"))
-        parent_values = [opt[0] for opt in parent_options]
+        parent_labels = {item.id: item.name for item in get_all_func()}
+        parent_labels[None] = "Ingen"
 
         parent_commitee = st.selectbox(
             "Overordnet udvalg",
-            options=parent_values,
-            format_func=lambda x: next(label for val, label in parent_options if val == x),
+            options=list(parent_labels),
+            format_func=lambda x: parent_labels[x],
             key="parent_udvalg_select"
         )
 
         new_udvalg_name = st.text_input("Navn på nyt udvalg")
 
-        type_options = [(t.id, t.name) for t in get_all_types_func(include_protected=True)]
-        type_values = [opt[0] for opt in type_options]
+        type_labels = {t.id: t.name for t in get_all_types_func(include_protected=True)}
 
         committee_type = st.selectbox(
             "Type",
-            options=type_values,
-            format_func=lambda x: next(label for val, label in type_options if val == x),
+            options=list(type_labels),
+            format_func=lambda x: type_labels[x],
             key="new_udvalg_type"
         )
 
@@ -100,24 +100,23 @@ def edit_union_form(id: int, get_func: callable, update_func: callable) -> None:
 def edit_name_form(type_name: str, get_all_func: callable, update_func: callable, hide_selectbox: bool = False) -> None:
     """Create a generic form for editing the name of an item of a given type (e.g., Role, CommitteeType)."""
     with st.form(f"edit_{type_name.lower()}_form"):
-        options = [(item.id, item.name) for item in get_all_func()]
-        values = [opt[0] for opt in options]
+        labels = {item.id: item.name for item in get_all_func()}
+        values = list(labels)
         if hide_selectbox:
             to_edit = values[0] if values else None
         else:
             to_edit = st.selectbox(
                 f"Vælg {type_name.lower()} at redigere",
                 options=values,
-                format_func=lambda x: next(label for val, label in options if val == x),
+                format_func=lambda x: labels[x],
                 key=f"edit_{type_name.lower()}_select"
             )
-        current_item = next((item for item in get_all_func() if item.id == to_edit), None)
         new_name = st.text_input("Nyt navn")
         submitted = st.form_submit_button(f"Opdater {type_name.lower()}", disabled=not to_edit)
         if submitted:
             if not new_name.strip():
                 st.warning("Navnet må ikke være tomt.")
-            elif current_item and new_name.strip() == current_item.name:
+            elif new_name.strip() == labels.get(to_edit):
                 st.info("Navnet er uændret.")
             else:
                 update_func(id=to_edit, name=new_name.strip())
@@ -132,13 +131,13 @@ def change_committee_type_form(current_id: int, get_current_func: callable, get_
         current_committee = get_current_func(current_id)
         current_type_id = current_committee.type_id if current_committee else None
 
-        options = [(item.id, item.name) for item in get_all_types_func(include_protected=True)]
-        values = [opt[0] for opt in options]
+        labels = {item.id: item.name for item in get_all_types_func(include_protected=True)}
+        values = list(labels)
 
         new_type_id = st.selectbox(
             label='Type',
             options=values,
-            format_func=lambda x: next(label for val, label in options if val == x),
+            format_func=lambda x: labels[x],
             index=values.index(current_type_id) if current_type_id in values else 0,
             key="edit_current_type_select"
         )
@@ -152,8 +151,7 @@ def change_committee_type_form(current_id: int, get_current_func: callable, get_
                     type_id=new_type_id
                 )
                 st.session_state.show_success = True
-                new_type_name = next(label for val, label in options if val == new_type_id)
-                st.session_state.success_message = f"Type er ændret til '{new_type_name}'."
+                st.session_state.success_message = f"Type er ændret til '{labels[new_type_id]}'."
                 st.rerun()
 
 
@@ -162,14 +160,14 @@ def move_committee_form(current_id: int, current_label: str, current_parent_id:
     with st.form("move_committee_form", clear_on_submit=True):
         st.write(f"Nuværende overordnet udvalg: **{current_parent_label}**")
 
-        if current_id != 1:  # Assuming 1 is the id of HOVEDUDVALG
-            options = [(item.id, item.name) for item in get_all_func()]
-            options.append((None, "Ingen"))
-            values = [opt[0] for opt in options]
+        if current_id != ROOT_COMMITTEE_ID:
+            labels = {item.id: item.name for item in get_all_func()}
+            labels[None] = "Ingen"
+            values = list(labels)
             new_parent_id = st.selectbox(
                 "Vælg nyt overordnet udvalg",
                 options=values,
-                format_func=lambda x: next(label for val, label in options if val == x),
+                format_func=lambda x: labels[x],
                 index=values.index(current_parent_id) if current_parent_id in values else 0,
                 key="move_parent_select"
             )
@@ -182,35 +180,106 @@ def move_committee_form(current_id: int, current_label: str, current_parent_id:
             if current_parent_id == new_parent_id:
                 st.warning("Vælg et nyt overordnet udvalg.")
             else:
-                update_func(
-                    id=current_id,
-                    parent_id=new_parent_id
-                )
+                try:
+                    update_func(
+                        id=current_id,
+                        parent_id=new_parent_id
+                    )
+                except ValueError:
+                    st.error("Et udvalg kan ikke flyttes ind under sig selv eller et af sine underudvalg.")
+                    st.stop()
                 st.session_state.show_success = True
-                new_parent_label = next(label for val, label in options if val == new_parent_id) if new_parent_id is not None else "Ingen (øverste niveau)"
+                new_parent_label = labels[new_parent_id] if new_parent_id is not None else "Ingen (øverste niveau)"
                 st.session_state.success_message = f"{current_label} er flyttet under {new_parent_label}."
                 st.rerun()
 
 
+def move_committees_form(get_all_func: callable, move_func: callable) -> None:
+    """Create a form for moving several committees under the same parent committee at once."""
+    with st.form("move_committees_form", clear_on_submit=True):
+        labels = {item.id: item.name for item in get_all_func()}
+        values = [value for value in labels if value != ROOT_COMMITTEE_ID]
+        committee_ids = st.multiselect(
+            "Vælg udvalg der skal flyttes",
+            options=values,
+            format_func=lambda x: labels[x],
+            key="move_committees_select"
+        )
+        parent_values = list(labels) + [None]
+        new_parent_id = st.selectbox(
+            "Vælg nyt overordnet udvalg",
+            options=parent_values,
+            format_func=lambda x: labels[x] if x is not None else "Ingen",
+            key="move_committees_parent_select"
+        )
+
+        submitted = st.form_submit_button("Flyt udvalg")
+        if submitted:
+            if not committee_ids:
+                st.warning("Vælg mindst ét udvalg.")
+            else:
+                try:
+                    move_func(moves=[(committee_id, new_parent_id) for committee_id in committee_ids])
+                except ValueError:
+                    st.error("Et udvalg kan ikke flyttes ind under sig selv eller et af sine underudvalg. Ingen udvalg er flyttet.")
+                    st.stop()
+                st.session_state.show_success = True
+                new_parent_label = labels[new_parent_id] if new_parent_id is not None else "Ingen (øverste niveau)"
+                st.session_state.success_message = f"{len(committee_ids)} udvalg er flyttet under {new_parent_label}."
+                st.rerun()
+
+
+# Danish messages for the errors merge_committees raises, others are shown as they are
+MERGE_ERROR_MESSAGES = {
+    "Committee cannot be merged into itself.": "Et udvalg kan ikke sammenlægges med sig selv.",
+    "Committee not found.": "Udvalget findes ikke længere. Genindlæs siden og prøv igen.",
+    "Committee cannot be moved below itself or one of its subcommittees.": "Et udvalg kan ikke sammenlægges med et af sine underudvalg.",
+}
+
+
+def merge_committee_form(current_id: int, current_label: str, get_all_func: callable, merge_func: callable) -> None:
+    """Create a form for merging a committee into another committee."""
+    with st.form("merge_committee_form", clear_on_submit=True):
+        st.write(f"Underudvalg og medlemmer af **{current_label}** flyttes til det valgte udvalg, og {current_label} slettes.")
+        labels = {item.id: item.name for item in get_all_func() if item.id != current_id}
+        target_id = st.selectbox(
+            "Vælg udvalg at sammenlægge med",
+            options=list(labels),
+            format_func=lambda x: labels[x],
+            key="merge_committee_select"
+        )
+
+        submitted = st.form_submit_button("Sammenlæg udvalg", disabled=current_id == ROOT_COMMITTEE_ID)
+        if submitted:
+            try:
+                merge_func(source_id=current_id, target_id=target_id)
+            except ValueError as e:
+                st.error(MERGE_ERROR_MESSAGES.get(str(e), str(e)))
+                st.stop()
+            st.session_state.checked_nodes = [target_id]
+            st.session_state.show_success = True
+            st.session_state.success_message = f"{current_label} er sammenlagt med {labels[target_id]}."
+            st.rerun()
+
+
 # DELETE forms
 def delete_form(type_name: str, get_all_func: callable, delete_func: callable, disabled: bool = False, hide_selectbox: bool = False) -> None:
     """Create a generic form for deleting an item of a given type (e.g., Role, Union)."""
     with st.form(f"delete_{type_name.lower()}_form"):
-        options = [(item.id, item.name) for item in get_all_func()]
-        values = [opt[0] for opt in options]
+        labels = {item.id: item.name for item in get_all_func()}
+        values = list(labels)
         if hide_selectbox:
             to_delete = values[0] if values else None
         else:
             to_delete = st.selectbox(
                 f"Vælg {type_name.lower()} at slette",
                 options=values,
-                format_func=lambda x: next(label for val, label in options if val == x),
+                format_func=lambda x: labels[x],
                 key=f"delete_{type_name.lower()}_select"
             )
         submitted = st.form_submit_button(f"Slet {type_name.lower()}", disabled=(to_delete is None or disabled))
         if submitted:
             delete_func(id=to_delete)
             st.session_state.show_success = True
-            name = next(label for val, label in options if val == to_delete)
-            st.session_state.success_message = f"{type_name.capitalize()} '{name}' er slettet."
+            st.session_state.success_message = f"{type_name.capitalize()} '{labels[to_delete]}' er slettet."
             st.rerun()
@@ -1,17 +1,30 @@
-import pandas as pd
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from functools import partial
 import streamlit as st
 import streamlit_antd_components as sac
-from io import BytesIO
 from streamlit_keycloak import login
 from streamlit_tree_select import tree_select
 
 from delta import DeltaClient
+from excel_export import create_excel_bytes, create_export_file, remove_export_file
 from meddb_data import MeddbData
-from models import CommitteeMembership
+from membership_import import IMPORT_COLUMNS, REQUIRED_COLUMNS, read_membership_file
+from read_models import CommitteeMemberRow
+from person_search import PersonSearch
 from school_data import SchoolData
-from forms import create_form, edit_name_form, delete_form, change_committee_type_form, move_committee_form, create_committee_form, create_union_form, edit_union_form
+from forms import create_form, edit_name_form, delete_form, change_committee_type_form, move_committee_form, move_committees_form, merge_committee_form, create_committee_form, create_union_form, edit_union_form
 from utils.database import DatabaseClient
-from utils.config import KEYCLOAK_URL, KEYCLOAK_REALM, KEYCLOAK_CLIENT_ID, XFLOW_URL, PRIORITY_MEMBERS, DB_HOST, DB_USER, DB_PASS, DB_NAME, DB_PORT, DB_SCHEMA, SKOLE_AD_DB_SCHEMA
+from utils.config import KEYCLOAK_URL, KEYCLOAK_REALM, KEYCLOAK_CLIENT_ID, XFLOW_URL, PRIORITY_MEMBERS, COMMITTEE_SEARCH_MAX_RESULTS, ROOT_COMMITTEE_ID, DB_HOST, DB_USER, DB_PASS, DB_NAME, DB_PORT, DB_SCHEMA, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT, DB_UNIT_OF_WORK_ENABLED, DB_CHANGE_NOTIFICATIONS_ENABLED, SKOLE_AD_DB_SCHEMA, DELTA_SEARCH_TIMEOUT, SKOLE_AD_SEARCH_TIMEOUT, SKOLE_AD_CREATE_SEARCH_INDEXES, SKOLE_AD_SNAPSHOT_ENABLED, SKOLE_AD_SNAPSHOT_MAX_AGE, METRICS_ENABLED, METRICS_PORT, QUERY_PROFILING_ENABLED, SLOW_QUERY_THRESHOLD, QUERY_REPEAT_THRESHOLD
+from utils.metrics import SCRIPT_RUN_SECONDS, SCRIPT_RUN_STATEMENTS, start_metrics_server
+from utils.query_profiler import QueryProfiler
+
+
+script_run_started = time.perf_counter()
+
+if METRICS_ENABLED:
+    start_metrics_server(port=METRICS_PORT)
 
 
 @st.cache_resource
@@ -27,587 +40,674 @@ def get_db_client():
         username=DB_USER,
         password=DB_PASS,
         host=DB_HOST,
-        port=DB_PORT
+        port=DB_PORT,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        statement_timeout=DB_STATEMENT_TIMEOUT
     )
 
 
+@st.cache_resource
+def get_query_profiler(_db_client):
+    return QueryProfiler(engine=_db_client.get_engine(), slow_query_threshold=SLOW_QUERY_THRESHOLD, repeat_threshold=QUERY_REPEAT_THRESHOLD)
+
+
 @st.cache_resource
 def get_meddb(_db_client):
-    return MeddbData(db_client=_db_client, schema=DB_SCHEMA)
+    return MeddbData(db_client=_db_client, schema=DB_SCHEMA, change_notifications=DB_CHANGE_NOTIFICATIONS_ENABLED)
 
 
 @st.cache_resource
 def get_schooldb(_db_client):
-    return SchoolData(db_client=_db_client, schema=SKOLE_AD_DB_SCHEMA)
+    return SchoolData(
+        db_client=_db_client,
+        schema=SKOLE_AD_DB_SCHEMA,
+        create_search_indexes=SKOLE_AD_CREATE_SEARCH_INDEXES,
+        snapshot_max_age=SKOLE_AD_SNAPSHOT_MAX_AGE if SKOLE_AD_SNAPSHOT_ENABLED else None
+    )
+
+
+@st.cache_resource
+def get_person_search(_delta_client, _schooldb):
+    return PersonSearch(delta_client=_delta_client, school_data=_schooldb, delta_timeout=DELTA_SEARCH_TIMEOUT, school_timeout=SKOLE_AD_SEARCH_TIMEOUT)
 
 
 delta_client = get_delta_client()
 db_client = get_db_client()
+query_profiler = get_query_profiler(db_client) if QUERY_PROFILING_ENABLED else None
+if query_profiler:
+    query_profiler.start_run(label="main")
 meddb = get_meddb(db_client)
 schooldb = get_schooldb(db_client)
+person_search = get_person_search(delta_client, schooldb)
 
 
-st.set_page_config(page_title="MED-Database", page_icon="🗄️", layout="wide", initial_sidebar_state="expanded")
-st.markdown('<style>table {width:100%;}</style>', unsafe_allow_html=True)
-st.markdown(
-    """
-    <style>
-    /* Make the resizable sidebar wider */
-    [data-testid="stSidebar"] {
-        width: 310px !important;          /* your desired width */
-        min-width: 310px !important;      /* ensures drag-resize starts at this width */
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-# State
-committee_tree, parent_map, node_map = meddb.get_committee_tree()
-
-if "checked_nodes" not in st.session_state:
-    st.session_state.checked_nodes = []
-
-if "expanded_nodes" not in st.session_state:
-    st.session_state.expanded_nodes = [1]
-
-if "show_success" not in st.session_state:
-    st.session_state.show_success = False
-
-edit_mode = st.session_state.get("editing", False)
-
-# Authentication
-keycloak = login(
-    url=KEYCLOAK_URL,
-    realm=KEYCLOAK_REALM,
-    client_id=KEYCLOAK_CLIENT_ID
-)
-
-user_roles = []
-
-if keycloak.authenticated:
-    email = keycloak.user_info.get('email', None)
-    if email:
-        email = email.lower()
-
-        user_roles = keycloak.user_info.get('resource_access', {}).get(KEYCLOAK_CLIENT_ID, {}).get('roles', [])
-
-        if 'edit_member' in user_roles and 'edit_udvalg' in user_roles:
-            st.write(f"Logget ind med: {email} - Du kan tilføje/fjerne medlemmer og administrere udvalg")
-        elif 'edit_member' in user_roles:
-            st.write(f"Logget ind med: {email} - Du kan tilføje/fjerne medlemmer")
-        elif 'edit_udvalg' in user_roles:
-            st.write(f"Logget ind med: {email} - Du kan administrere udvalg")
-        else:
-            st.write(f"Logget ind med: {email} - Du har ingen redigeringsrettigheder.")
+def _read_file(path: str) -> bytes:
+    """Read a file, used to defer reading export files until they are downloaded."""
+    with open(path, 'rb') as f:
+        return f.read()
 
-        st.markdown(f"Anmod om redigeringsrettigheder [her]({XFLOW_URL})")
 
-    else:
-        st.error("Ingen e-mail fundet i brugeroplysningerne.")
-
-if user_roles:
-    if user_roles and st.session_state.get("editing", False):
-        st.markdown("<span style='font-size:2em; color:red; font-weight:bold;'>Du er ved at redigere</span>", unsafe_allow_html=True)
-    if st.button("Rediger" if not edit_mode else "Afslut redigering", key="toggle_editing"):
-        st.session_state.editing = not edit_mode
-        st.rerun()
-
-# Menu - Committee selection
-with st.sidebar:
-    st.subheader("Udvalg")
-    selected = tree_select(
-        committee_tree,
-        no_cascade=True,
-        expanded=st.session_state.expanded_nodes,
-        checked=st.session_state.checked_nodes
+@st.cache_data(max_entries=100, show_spinner=False)
+def get_members_excel(committee_id: int, membership_version: tuple[int, int], include_unions: bool, sheet_name: str, _memberships: list[CommitteeMemberRow]) -> bytes:
+    """Generate an Excel file of committee members. Cached on committee ID and membership version, the memberships themselves are not hashed."""
+    columns = ["Navn", "Email", "Rolle", "Org. Enhed", "I systemet"] + (["Fagforening"] if include_unions else [])
+
+    def _membership_to_row(membership: CommitteeMemberRow) -> list:
+        """Helper function to map a CommitteeMemberRow to a row."""
+        row = [
+            membership.name,
+            membership.email,
+            membership.role_name,
+            membership.organization,
+            "Ja" if membership.found_in_system else "Nej"
+        ]
+        if include_unions:
+            row.append(membership.union_name)
+        return row
+
+    return create_excel_bytes(sheet_name=sheet_name, columns=columns, rows=[_membership_to_row(m) for m in _memberships])
+
+
+@contextmanager
+def script_run():
+    """
+    Wrap the script body: runs it as one unit of work when enabled, with one session and connection for the whole render, and records its duration
+    and, when query profiling is enabled, its statements. st.stop(), st.rerun() and errors end the run by raising through the with statement,
+    so the unit of work is ended and the run recorded however it ends. The statement summary is only shown in the sidebar for runs that reach the end.
+    """
+    query_summary = None
+    try:
+        with db_client.unit_of_work() if DB_UNIT_OF_WORK_ENABLED else nullcontext():
+            yield
+    finally:
+        SCRIPT_RUN_SECONDS.observe(time.perf_counter() - script_run_started)
+        if query_profiler:
+            query_summary = query_profiler.end_run()
+            if query_summary is not None:
+                SCRIPT_RUN_STATEMENTS.observe(query_summary.statements)
+    if query_summary is not None:
+        st.sidebar.caption(f"{query_summary.statements} SQL-forespørgsler, {query_summary.total_seconds * 1000:.0f} ms")
+
+
+with script_run():
+    st.set_page_config(page_title="MED-Database", page_icon="🗄️", layout="wide", initial_sidebar_state="expanded")
+    st.markdown('<style>table {width:100%;}</style>', unsafe_allow_html=True)
+    st.markdown(
+        """
+        <style>
+        /* Make the resizable sidebar wider */
+        [data-testid="stSidebar"] {
+            width: 310px !important;          /* your desired width */
+            min-width: 310px !important;      /* ensures drag-resize starts at this width */
+        }
+        </style>
+        """,
+        unsafe_allow_html=True,
     )
 
-    if selected:
-        new_checked_nodes = selected.get("checked", [])
+    # State
+    committee_tree, parent_map, node_map = meddb.get_committee_tree()
 
-        try:
-            new_checked_nodes = [int(v) for v in new_checked_nodes]
-        except Exception:
-            pass
+    if "checked_nodes" not in st.session_state:
+        st.session_state.checked_nodes = []
 
-        if len(new_checked_nodes) == 0:
-            st.session_state.checked_nodes = []
-            st.session_state.expanded_nodes = [1]  # Reset to root (HOVEDUDVALG)
+    if "expanded_nodes" not in st.session_state:
+        st.session_state.expanded_nodes = [ROOT_COMMITTEE_ID]
 
-        if len(new_checked_nodes) == 2:
-            new_checked_nodes = [
-                node for node in new_checked_nodes
-                if node not in st.session_state.checked_nodes
-            ]
+    if "show_success" not in st.session_state:
+        st.session_state.show_success = False
 
-        if len(new_checked_nodes) == 1:
-            expanded_nodes = []
-            current_node = new_checked_nodes[0]
-            while current_node is not None:
-                expanded_nodes.append(current_node)
-                current_node = parent_map.get(current_node)
+    edit_mode = st.session_state.get("editing", False)
 
-            expanded_nodes = expanded_nodes or [1]  # Reset to root (HOVEDUDVALG)
-            st.session_state.expanded_nodes = expanded_nodes
+    # Authentication
+    keycloak = login(
+        url=KEYCLOAK_URL,
+        realm=KEYCLOAK_REALM,
+        client_id=KEYCLOAK_CLIENT_ID
+    )
 
-        if len(new_checked_nodes) == 1 and new_checked_nodes != st.session_state.checked_nodes:
-            st.session_state.checked_nodes = new_checked_nodes
-            st.rerun()
+    user_roles = []
 
-        if len(new_checked_nodes) == 2:
-            st.session_state.checked_nodes = [new_checked_nodes[-1]]
-            st.rerun()
+    if keycloak.authenticated:
+        email = keycloak.user_info.get('email', None)
+        if email:
+            email = email.lower()
 
-        if len(new_checked_nodes) > 2:
-            st.warning("Multiple nodes selected. Resetting selection...")
-            st.session_state.checked_nodes = []
-            st.rerun()
+            user_roles = keycloak.user_info.get('resource_access', {}).get(KEYCLOAK_CLIENT_ID, {}).get('roles', [])
 
-# Message control
-if st.session_state.get("show_success", False):
-    col_left, col_right = st.columns([1, 1])
-    with col_left:
-        st.success(st.session_state.get("success_message", " "))
-        if st.button("OK"):
-            st.session_state.show_success = False
-            st.session_state.success_message = ""
-            st.rerun()
-    st.stop()
+            if 'edit_member' in user_roles and 'edit_udvalg' in user_roles:
+                st.write(f"Logget ind med: {email} - Du kan tilføje/fjerne medlemmer og administrere udvalg")
+            elif 'edit_member' in user_roles:
+                st.write(f"Logget ind med: {email} - Du kan tilføje/fjerne medlemmer")
+            elif 'edit_udvalg' in user_roles:
+                st.write(f"Logget ind med: {email} - Du kan administrere udvalg")
+            else:
+                st.write(f"Logget ind med: {email} - Du har ingen redigeringsrettigheder.")
+
+            st.markdown(f"Anmod om redigeringsrettigheder [her]({XFLOW_URL})")
 
-# Committee selected - show details
-elif st.session_state.checked_nodes:
-    item = st.session_state.checked_nodes[0]
-    selected_node = node_map.get(int(item), {})
-    if selected_node:
-        st.header(selected_node.get('label', 'Ukendt'))
-        st.write(selected_node.get('className') if selected_node.get('className') is not None else 'Ukendt')
+        else:
+            st.error("Ingen e-mail fundet i brugeroplysningerne.")
 
+    if user_roles:
         if user_roles and st.session_state.get("editing", False):
-            tabs_items = []
-            if 'edit_member' in user_roles:
-                tabs_items.append(sac.TabsItem(label='Medlemmer'))
-            if 'edit_udvalg' in user_roles:
-                tabs_items.append(sac.TabsItem(label='Udvalg'))
+            st.markdown("<span style='font-size:2em; color:red; font-weight:bold;'>Du er ved at redigere</span>", unsafe_allow_html=True)
+        if st.button("Rediger" if not edit_mode else "Afslut redigering", key="toggle_editing"):
+            st.session_state.editing = not edit_mode
+            st.rerun()
 
-            default_tab = st.session_state.get("selected_edit_tab", tabs_items[0].label if tabs_items else None)
-            tabs = sac.tabs(
-                items=tabs_items,
-                align='center',
-                use_container_width=True,
-                index=[item.label for item in tabs_items].index(default_tab) if default_tab and tabs_items else 0
-            )
+    # Menu - Committee selection
+    with st.sidebar:
+        st.subheader("Udvalg")
+        selected = tree_select(
+            committee_tree,
+            no_cascade=True,
+            expanded=st.session_state.expanded_nodes,
+            checked=st.session_state.checked_nodes
+        )
 
-            st.session_state["selected_edit_tab"] = tabs
+        if selected:
+            new_checked_nodes = selected.get("checked", [])
+
+            try:
+                new_checked_nodes = [int(v) for v in new_checked_nodes]
+            except Exception:
+                pass
+
+            if len(new_checked_nodes) == 0:
+                st.session_state.checked_nodes = []
+                st.session_state.expanded_nodes = [ROOT_COMMITTEE_ID]  # Reset to root (HOVEDUDVALG)
+
+            if len(new_checked_nodes) == 2:
+                new_checked_nodes = [
+                    node for node in new_checked_nodes
+                    if node not in st.session_state.checked_nodes
+                ]
+
+            if len(new_checked_nodes) == 1:
+                expanded_nodes = []
+                current_node = new_checked_nodes[0]
+                while current_node is not None:
+                    expanded_nodes.append(current_node)
+                    current_node = parent_map.get(current_node)
+
+                expanded_nodes = expanded_nodes or [ROOT_COMMITTEE_ID]  # Reset to root (HOVEDUDVALG)
+                st.session_state.expanded_nodes = expanded_nodes
+
+            if len(new_checked_nodes) == 1 and new_checked_nodes != st.session_state.checked_nodes:
+                st.session_state.checked_nodes = new_checked_nodes
+                st.rerun()
+
+            if len(new_checked_nodes) == 2:
+                st.session_state.checked_nodes = [new_checked_nodes[-1]]
+                st.rerun()
+
+            if len(new_checked_nodes) > 2:
+                st.warning("Multiple nodes selected. Resetting selection...")
+                st.session_state.checked_nodes = []
+                st.rerun()
+
+    # Message control
+    if st.session_state.get("show_success", False):
+        col_left, col_right = st.columns([1, 1])
+        with col_left:
+            st.success(st.session_state.get("success_message", " "))
+            if st.button("OK"):
+                st.session_state.show_success = False
+                st.session_state.success_message = ""
+                st.rerun()
+        st.stop()
+
+    # Committee selected - show details
+    elif st.session_state.checked_nodes:
+        item = st.session_state.checked_nodes[0]
+        selected_node = node_map.get(int(item), {})
+        # The committee, its members and, when editing, the form options, in at most two queries
+        committee_page = meddb.load_committee_page(
+            committee_id=int(item),
+            include_union='edit_member' in user_roles,
+            editing=bool(user_roles and st.session_state.get("editing", False))
+        ) if selected_node else None
+        if selected_node and committee_page:
+            st.header(selected_node.get('label', 'Ukendt'))
+            st.write(selected_node.get('className') if selected_node.get('className') is not None else 'Ukendt')
 
-            # Admin section - search and add members
             if user_roles and st.session_state.get("editing", False):
-                if 'edit_member' in user_roles and tabs == 'Medlemmer':
-                    res = st.session_state.get("people_search", [])
-                    st.subheader("Tilføj medlem")
-                    with st.form("search_form", clear_on_submit=True):
-                        name = st.text_input("Navn")
-                        email = st.text_input("E-mail")
-
-                        search = st.form_submit_button("Søg")
-                        if search:
-                            if not name and not email:
-                                st.error("Indtast mindst ét søgekriterie: navn eller e-mail.")
-                                st.stop()
-                            res = delta_client.search(search_name=name, email=email)
-                            school_res = schooldb.search_person(name=name, email=email)
-                            res.extend(school_res)
-                            st.session_state.people_search = res
-
-                        clear_search = st.form_submit_button("Nulstil søgning", disabled=not res)
-                        if clear_search:
-                            st.session_state.people_search = []
-                            st.rerun()
-                    if res:
-                        role_options = [(None, "Ingen")] + [(r.id, r.name) for r in meddb.get_all_roles()]
-                        role_values = [opt[0] for opt in role_options]
-
-                        union_options = [(None, "Ingen")] + [(u.id, u.name) for u in meddb.get_all_unions()]
-                        union_values = [opt[0] for opt in union_options]
-
-                        expand = True if len(res) == 1 else False
-                        for r in res:
-                            with st.expander(r['Navn'], expanded=expand):
-                                with st.form(f"add_member_form_{r['Navn']}_{r['Afdeling']}", clear_on_submit=True):
-                                    top_line = '| ' + ' | '.join(['Navn', 'Afdeling']) + ' |' + '\n| ' + ' | '.join(['---'] * 2) + ' |' + '\n| ' + ' | '.join([r['Navn'], r['Afdeling']]) + ' |'
-                                    buttom_line = '| E-mail |' + '\n| --- |' + '\n| ' + r['E-mail'] + ' |'
-                                    st.markdown(top_line)
-                                    st.markdown(buttom_line)
-                                    role = st.selectbox(
-                                        "Rolle",
-                                        options=role_values,
-                                        format_func=lambda x: next(label for val, label in role_options if val == x),
-                                        key=f"role_{r['Navn']}_{r['Afdeling']}"
-                                    )
-                                    union = st.selectbox(
-                                        "Fagforening",
-                                        options=union_values,
-                                        format_func=lambda x: next(label for val, label in union_options if val == x),
-                                        key=f"union_{r['Navn']}_{r['Afdeling']}"
-                                    )
-                                    add_btn = st.form_submit_button("Tilføj")
-                                    if add_btn:
-                                        if role is None:
-                                            st.error("Vælg en rolle for medlemmet.")
-                                        else:
-                                            person = meddb.add_or_update_person(name=r['Navn'], email=r['E-mail'], username=r['Brugernavn'], organization=r['Afdeling'], union_id=union)
-                                            committee_membership = meddb.create_committee_member(person_id=person.id, committee_id=selected_node['value'], role_id=role)
-                                            st.session_state.success_message = (f"{person.name} er tilføjet som {committee_membership.role.name} til {selected_node['label']}.")
-                                            st.session_state.show_success = True
-                                            st.rerun()
-
-                # Admin section - edit current committee
-                if 'edit_udvalg' in user_roles and tabs == 'Udvalg':
-                    top_left, top_right = st.columns(2)
-                    bottom_left, bottom_right = st.columns(2)
-                    with top_left:
-                        st.subheader("Omdøb udvalg")
-                        edit_name_form(
-                            type_name="udvalg",
-                            get_all_func=lambda: [meddb.get_committee_by_id(selected_node['value'])],
-                            update_func=meddb.update_committee,
-                            hide_selectbox=True
-                        )
-                    with top_right:
-                        st.subheader("Skift type")
-                        current_udvalg_id = selected_node['value']
-                        change_committee_type_form(
-                            current_id=current_udvalg_id,
-                            get_current_func=meddb.get_committee_by_id,
-                            get_all_types_func=meddb.get_all_committee_types,
-                            update_func=meddb.update_committee
-                        )
-                    with bottom_left:
-                        st.subheader("Flyt udvalg")
-                        current_id = selected_node['value']
-                        current_label = selected_node['label']
-                        current_parent_id = parent_map.get(current_id)
-                        current_parent_label = node_map[current_parent_id]["label"] if current_parent_id and current_parent_id in node_map else "Ingen (øverste niveau)"
-                        move_committee_form(
-                            current_id=current_id,
-                            current_label=current_label,
-                            current_parent_id=current_parent_id,
-                            current_parent_label=current_parent_label,
-                            get_all_func=meddb.get_committees,
-                            update_func=meddb.update_committee
-                        )
-                    with bottom_right:
-                        st.subheader("Slet udvalg")
-                        with st.container(border=True):
-                            st.warning(
-                                "Advarsel: Sletning af et udvalg vil også slette personers tilknytning til udvalget. "
-                                "Denne handling kan ikke fortrydes."
-                            )
-                            confirm_delete = st.checkbox(f'Jeg bekræfter, at jeg vil slette udvalget "{selected_node.get("label", "")}" permanent.')
-                            if confirm_delete and not st.session_state.get("confirm_delete_checked", False):
-                                st.session_state["confirm_delete_checked"] = True
-                                st.rerun()
-                            elif not confirm_delete and st.session_state.get("confirm_delete_checked", False):
-                                st.session_state["confirm_delete_checked"] = False
+                tabs_items = []
+                if 'edit_member' in user_roles:
+                    tabs_items.append(sac.TabsItem(label='Medlemmer'))
+                if 'edit_udvalg' in user_roles:
+                    tabs_items.append(sac.TabsItem(label='Udvalg'))
+
+                default_tab = st.session_state.get("selected_edit_tab", tabs_items[0].label if tabs_items else None)
+                tabs = sac.tabs(
+                    items=tabs_items,
+                    align='center',
+                    use_container_width=True,
+                    index=[item.label for item in tabs_items].index(default_tab) if default_tab and tabs_items else 0
+                )
+
+                st.session_state["selected_edit_tab"] = tabs
+
+                # Admin section - search and add members
+                if user_roles and st.session_state.get("editing", False):
+                    if 'edit_member' in user_roles and tabs == 'Medlemmer':
+                        res = st.session_state.get("people_search", [])
+                        st.subheader("Tilføj medlem")
+                        with st.form("search_form", clear_on_submit=True):
+                            name = st.text_input("Navn")
+                            email = st.text_input("E-mail")
+
+                            search = st.form_submit_button("Søg")
+                            if search:
+                                if not name and not email:
+                                    st.error("Indtast mindst ét søgekriterie: navn eller e-mail.")
+                                    st.stop()
+                                search_result = person_search.search(name=name, email=email)
+                                if search_result.failed_sources:
+                                    st.warning(f"Søgning i {' og '.join(search_result.failed_sources)} svarede ikke i tide. Resultatet kan være ufuldstændigt.")
+                                res = search_result.persons
+                                st.session_state.people_search = res
+
+                            clear_search = st.form_submit_button("Nulstil søgning", disabled=not res)
+                            if clear_search:
+                                st.session_state.people_search = []
                                 st.rerun()
-                            delete_form(
+                        if res:
+                            role_labels = {None: "Ingen"} | {r.id: r.name for r in committee_page.roles}
+                            role_values = list(role_labels)
+
+                            union_labels = {None: "Ingen"} | {u.id: u.name for u in committee_page.unions}
+                            union_values = list(union_labels)
+
+                            expand = True if len(res) == 1 else False
+                            for r in res:
+                                with st.expander(r['Navn'], expanded=expand):
+                                    with st.form(f"add_member_form_{r['Navn']}_{r['Afdeling']}", clear_on_submit=True):
+                                        top_line = '| ' + ' | '.join(['Navn', 'Afdeling']) + ' |' + '\n| ' + ' | '.join(['---'] * 2) + ' |' + '\n| ' + ' | '.join([r['Navn'], r['Afdeling']]) + ' |'
+                                        buttom_line = '| E-mail |' + '\n| --- |' + '\n| ' + r['E-mail'] + ' |'
+                                        st.markdown(top_line)
+                                        st.markdown(buttom_line)
+                                        role = st.selectbox(
+                                            "Rolle",
+                                            options=role_values,
+                                            format_func=lambda x: role_labels[x],
+                                            key=f"role_{r['Navn']}_{r['Afdeling']}"
+                                        )
+                                        union = st.selectbox(
+                                            "Fagforening",
+                                            options=union_values,
+                                            format_func=lambda x: union_labels[x],
+                                            key=f"union_{r['Navn']}_{r['Afdeling']}"
+                                        )
+                                        add_btn = st.form_submit_button("Tilføj")
+                                        if add_btn:
+                                            if role is None:
+                                                st.error("Vælg en rolle for medlemmet.")
+                                            else:
+                                                person = meddb.add_or_update_person(name=r['Navn'], email=r['E-mail'], username=r['Brugernavn'], organization=r['Afdeling'], union_id=union)
+                                                committee_membership = meddb.create_committee_member(person_id=person.id, committee_id=selected_node['value'], role_id=role)
+                                                st.session_state.success_message = (f"{person.name} er tilføjet som {committee_membership.role.name} til {selected_node['label']}.")
+                                                st.session_state.show_success = True
+                                                st.rerun()
+
+                    # Admin section - edit current committee
+                    if 'edit_udvalg' in user_roles and tabs == 'Udvalg':
+                        top_left, top_right = st.columns(2)
+                        bottom_left, bottom_right = st.columns(2)
+                        with top_left:
+                            st.subheader("Omdøb udvalg")
+                            edit_name_form(
                                 type_name="udvalg",
-                                get_all_func=lambda: [meddb.get_committee_by_id(selected_node['value'])],
-                                delete_func=meddb.delete_committee,
-                                disabled=not confirm_delete,
+                                get_all_func=lambda: [committee_page],
+                                update_func=meddb.update_committee,
                                 hide_selectbox=True
                             )
-        # Show current members
-        include_unions = 'edit_member' in user_roles
-        memberships = meddb.get_committee_members(committee_id=selected_node['value'], include_union=include_unions)
-        emails = [m.person.email for m in memberships if m.person.email]
-        if emails:
-            mailto_link = f"mailto:{';'.join(emails)}"
-            st.link_button(
-                label="Send e-mail til alle i udvalg",
-                url=mailto_link,
-                use_container_width=False
-            )
+                        with top_right:
+                            st.subheader("Skift type")
+                            current_udvalg_id = selected_node['value']
+                            change_committee_type_form(
+                                current_id=current_udvalg_id,
+                                get_current_func=lambda _: committee_page,
+                                get_all_types_func=lambda include_protected: committee_page.committee_types,
+                                update_func=meddb.update_committee
+                            )
+                        with bottom_left:
+                            st.subheader("Flyt udvalg")
+                            current_id = selected_node['value']
+                            current_label = selected_node['label']
+                            current_parent_id = parent_map.get(current_id)
+                            current_parent_label = node_map[current_parent_id]["label"] if current_parent_id and current_parent_id in node_map else "Ingen (øverste niveau)"
+                            move_committee_form(
+                                current_id=current_id,
+                                current_label=current_label,
+                                current_parent_id=current_parent_id,
+                                current_parent_label=current_parent_label,
+                                get_all_func=lambda: committee_page.committees,
+                                update_func=meddb.update_committee
+                            )
+                        with bottom_right:
+                            st.subheader("Slet udvalg")
+                            with st.container(border=True):
+                                st.warning(
+                                    "Advarsel: Sletning af et udvalg vil også slette personers tilknytning til udvalget. "
+                                    "Denne handling kan ikke fortrydes."
+                                )
+                                confirm_delete = st.checkbox(f'Jeg bekræfter, at jeg vil slette udvalget "{selected_node.get("label", "")}" permanent.')
+                                if confirm_delete and not st.session_state.get("confirm_delete_checked", False):
+                                    st.session_state["confirm_delete_checked"] = True
+                                    st.rerun()
+                                elif not confirm_delete and st.session_state.get("confirm_delete_checked", False):
+                                    st.session_state["confirm_delete_checked"] = False
+                                    st.rerun()
+                                delete_subtree = st.checkbox("Slet også alle underudvalg og deres medlemmer", key="delete_subtree") if selected_node.get('children') else False
+                                delete_form(
+                                    type_name="udvalg",
+                                    get_all_func=lambda: [committee_page],
+                                    delete_func=meddb.delete_committee_subtree if delete_subtree else meddb.delete_committee,
+                                    disabled=not confirm_delete,
+                                    hide_selectbox=True
+                                )
+                        st.subheader("Sammenlæg udvalg")
+                        merge_committee_form(
+                            current_id=selected_node['value'],
+                            current_label=selected_node['label'],
+                            get_all_func=lambda: committee_page.committees,
+                            merge_func=meddb.merge_committees
+                        )
+            # Show current members
+            include_unions = 'edit_member' in user_roles
+            membership_version = committee_page.membership_version
+            memberships = committee_page.members
+            emails = [m.email for m in memberships if m.email]
+            if emails:
+                mailto_link = f"mailto:{';'.join(emails)}"
+                st.link_button(
+                    label="Send e-mail til alle i udvalg",
+                    url=mailto_link,
+                    use_container_width=False
+                )
 
-        def _clean_string(name: str) -> str:
-            """Helper function to clean a string for use as a filename and Excel sheet name."""
-            name = name[:30] if len(name) > 30 else name
-            invalid_chars = r'<>:"/\|?*'
-            for ch in invalid_chars:
-                name = name.replace(ch, "_")
-            return name
-
-        def _generate_members_excel(memberships: list[CommitteeMembership], sheet_name: str) -> bytes:
-            """Helper function. Generate an Excel file of committee members with adjusted column widths."""
-            def _membership_to_row(membership: CommitteeMembership) -> dict:
-                """Helper function to map a CommitteeMembership to a dictionary row."""
-                row = {
-                    "Navn": membership.person.name,
-                    "Email": membership.person.email,
-                    "Rolle": membership.role.name,
-                    "Org. Enhed": membership.person.organization,
-                    "I systemet": "Ja" if membership.person.found_in_system else "Nej"
-                }
-                if include_unions:
-                    row["Fagforening"] = membership.person.union.name if membership.person.union else None
-                return row
-
-            df = pd.DataFrame([_membership_to_row(m) for m in memberships])
-
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name=sheet_name)
-                worksheet = writer.sheets[sheet_name]
-                for idx, col in enumerate(df.columns):
-                    # Set width to at least the length of the column name + 2
-                    width = max(df[col].astype(str).map(len).max() if not df.empty else 0, len(col)) + 2
-                    worksheet.set_column(idx, idx, width)
-            buffer.seek(0)
-            return buffer.getvalue()
-
-        name = _clean_string(selected_node.get('label', 'Ukendt'))
-
-        st.download_button(
-            label="Download som Excel-fil",
-            data=_generate_members_excel(
-                memberships=memberships,
-                sheet_name=name
-            ),
-            file_name=f"{name}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+            def _clean_string(name: str) -> str:
+                """Helper function to clean a string for use as a filename and Excel sheet name."""
+                name = name[:30] if len(name) > 30 else name
+                invalid_chars = r'<>:"/\|?*'
+                for ch in invalid_chars:
+                    name = name.replace(ch, "_")
+                return name
 
-        def _get_priority(role):
-            """Helper function to get priority index for a role based on PRIORITY_MEMBERS list."""
-            return PRIORITY_MEMBERS.index(role) if role in PRIORITY_MEMBERS else len(PRIORITY_MEMBERS)
+            name = _clean_string(selected_node.get('label', 'Ukendt'))
 
-        sorted_rows = sorted(
-            memberships,
-            key=lambda x: (_get_priority(role=x.role.name), x.role.name, x.person.name)
-        )
+            # A callable is only run when the button is clicked, so browsing committees builds no workbooks
+            st.download_button(
+                label="Download som Excel-fil",
+                data=partial(
+                    get_members_excel,
+                    committee_id=selected_node['value'],
+                    membership_version=membership_version,
+                    include_unions=include_unions,
+                    sheet_name=name,
+                    _memberships=memberships
+                ),
+                file_name=f"{name}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
 
-        cols_list = [2, 2, 2, 2, 1] if include_unions and st.session_state.get("editing", False) else [2, 2, 2, 2] if include_unions else [2, 2, 2]
+            def _get_priority(role):
+                """Helper function to get priority index for a role based on PRIORITY_MEMBERS list."""
+                return PRIORITY_MEMBERS.index(role) if role in PRIORITY_MEMBERS else len(PRIORITY_MEMBERS)
 
-        cols = st.columns(cols_list)
-        cols[0].markdown("<span style='font-size:1.2em; font-weight:bold;'>Navn</span>", unsafe_allow_html=True)
-        cols[1].markdown("<span style='font-size:1.2em; font-weight:bold;'>Rolle</span>", unsafe_allow_html=True)
-        cols[2].markdown("<span style='font-size:1.2em; font-weight:bold;'>Email</span>", unsafe_allow_html=True)
-        if include_unions:
-            cols[3].markdown("<span style='font-size:1.2em; font-weight:bold;'>Fagforening</span>", unsafe_allow_html=True)
-        if include_unions and st.session_state.get("editing", False):
-            cols[4].write(' ')
-
-        for i, m in enumerate(sorted_rows):
-            cols = st.columns(cols_list)
-            cols[0].markdown(f"<span>{m.person.name}</span>", unsafe_allow_html=True)
-            cols[1].markdown(f"<span>{m.role.name}</span>", unsafe_allow_html=True)
-            if not m.person.found_in_system:
-                email_link = f'<span>{m.person.email} ❌</span>'
-            else:
-                email_link = f'<span>{m.person.email}</span>'
-            cols[2].markdown(email_link, unsafe_allow_html=True)
+            sorted_rows = sorted(
+                memberships,
+                key=lambda x: (_get_priority(role=x.role_name), x.role_name, x.name)
+            )
+
+            # One dataframe for all members, so the number of elements sent on each rerun does not grow with the committee size
+            member_table = {
+                "Navn": [m.name for m in sorted_rows],
+                "Rolle": [m.role_name for m in sorted_rows],
+                "Email": [m.email if m.found_in_system else f"{m.email} ❌" for m in sorted_rows],
+            }
             if include_unions:
-                cols[3].markdown(f"<span>{m.person.union.name if m.person.union else ''}</span>", unsafe_allow_html=True)
-            # Admin - remove member button
+                member_table["Fagforening"] = [m.union_name or "" for m in sorted_rows]
+
+            # Admin - select members in the table and remove them
             if 'edit_member' in user_roles and st.session_state.get("editing", False):
-                if cols[4].button("Fjern", key=f"slet_{m.person.name}_{m.role.name}_{m.person.email}"):
-                    meddb.delete_committee_member(committee_id=m.committee_id, person_id=m.person_id, role_id=m.role_id)
+                member_selection = st.dataframe(
+                    member_table,
+                    hide_index=True,
+                    on_select="rerun",
+                    selection_mode="multi-row",
+                    # Selections are row positions, so start over when the memberships change
+                    key=f"member_table_{selected_node['value']}_{membership_version[0]}_{membership_version[1]}"
+                )
+                selected_members = [sorted_rows[i] for i in member_selection.selection.rows if i < len(sorted_rows)]
+                if st.button(f"Fjern valgte ({len(selected_members)})", disabled=not selected_members, key="remove_selected_members"):
+                    meddb.delete_committee_members(
+                        committee_id=selected_node['value'],
+                        members=[(m.person_id, m.role_id) for m in selected_members]
+                    )
                     st.session_state.show_success = True
-                    st.session_state.success_message = f"{m.role.name} {m.person.name} er fjernet fra {selected_node['label']}."
-                    st.rerun()
-    else:
-        st.error("Selected node not found.")
-
-# No committee selected - show search and export options
-else:
-    st.write("Intet udvalg valgt.")
-    st.subheader("Søg udvalg")
-    search_query = st.text_input("Søg efter udvalg...", key="udvalg_search")
-
-    if search_query:
-        def _flatten_nodes(committee_tree):
-            """Helper function to flatten the committee tree into a list."""
-            flat = []
-            for node in committee_tree:
-                flat.append(node)
-                if node.get("children"):
-                    flat.extend(_flatten_nodes(node["children"]))
-            return flat
-
-        flat_nodes = _flatten_nodes(committee_tree=committee_tree)
-        filtered = [n for n in flat_nodes if search_query.lower() in n["label"].lower()]
-
-        if filtered:
-            st.write("Fundne udvalg:")
-            for m in filtered:
-                if st.button(m["label"], key=f"search_select_{m['value']}"):
-                    # Set checked node
-                    st.session_state.checked_nodes = [m["value"]]
-
-                    # Compute expanded path using parent_map
-                    expanded_nodes = []
-                    current_node = m["value"]
-                    while current_node is not None:
-                        expanded_nodes.append(current_node)
-                        current_node = parent_map.get(current_node)
-
-                    expanded_nodes = expanded_nodes or [1]  # Reset to root (HOVEDUDVALG)
-                    st.session_state.expanded_nodes = expanded_nodes
+                    st.session_state.success_message = (
+                        f"{selected_members[0].role_name} {selected_members[0].name} er fjernet fra {selected_node['label']}."
+                        if len(selected_members) == 1
+                        else f"{len(selected_members)} medlemmer er fjernet fra {selected_node['label']}."
+                    )
                     st.rerun()
+            else:
+                st.dataframe(member_table, hide_index=True)
         else:
-            st.info("Ingen udvalg matcher søgningen.")
+            st.error("Selected node not found.")
 
-    # Data export section
-    if 'edit_udvalg' in user_roles and 'edit_member' in user_roles and not edit_mode:
-        st.subheader("Dataudtræk")
+    # No committee selected - show search and export options
+    else:
+        st.write("Intet udvalg valgt.")
+        st.subheader("Søg udvalg")
+        search_query = st.text_input("Søg efter udvalg...", key="udvalg_search")
+
+        if search_query:
+            filtered = meddb.search_committees(query=search_query)
+
+            if filtered:
+                st.write("Fundne udvalg:")
+                if len(filtered) > COMMITTEE_SEARCH_MAX_RESULTS:
+                    st.caption(f"Viser de {COMMITTEE_SEARCH_MAX_RESULTS} bedste af {len(filtered)} udvalg. Skriv mere for at indsnævre søgningen.")
+                for m in filtered[:COMMITTEE_SEARCH_MAX_RESULTS]:
+                    if st.button(m["label"], key=f"search_select_{m['value']}"):
+                        # Set checked node
+                        st.session_state.checked_nodes = [m["value"]]
+
+                        # Compute expanded path using parent_map
+                        expanded_nodes = []
+                        current_node = m["value"]
+                        while current_node is not None:
+                            expanded_nodes.append(current_node)
+                            current_node = parent_map.get(current_node)
+
+                        expanded_nodes = expanded_nodes or [ROOT_COMMITTEE_ID]  # Reset to root (HOVEDUDVALG)
+                        st.session_state.expanded_nodes = expanded_nodes
+                        st.rerun()
+            else:
+                st.info("Ingen udvalg matcher søgningen.")
 
-        role_options = [(role.id, role.name) for role in meddb.get_all_roles()]
-        role_values = [opt[0] for opt in role_options]
+        # Data export section
+        if 'edit_udvalg' in user_roles and 'edit_member' in user_roles and not edit_mode:
+            st.subheader("Dataudtræk")
 
-        sector_options = [(committee.id, committee.name) for committee in meddb.get_committees_by_parent_id(parent_id=1)]  # Assuming parent_id=1 corresponds to "HOVEDUDVALG" and that all sectors are its children
-        sector_values = [opt[0] for opt in sector_options]
+            reference_data = meddb.get_reference_data()
+            role_labels = reference_data.role_names
+            role_values = list(role_labels)
 
-        union_options = [(union.id, union.name) for union in meddb.get_all_unions()]
-        if union_options:
-            union_options.append((None, "Ingen"))
-        union_values = [opt[0] for opt in union_options]
+            sector_labels = {committee.id: committee.name for committee in meddb.get_committees_by_parent_id(parent_id=ROOT_COMMITTEE_ID)}  # All sectors are children of the root
+            sector_values = list(sector_labels)
 
-        in_system_options = [(None, "Alle"), (True, "I systemet"), (False, "Ikke i systemet")]
-        in_system_values = [opt[0] for opt in in_system_options]
+            union_labels = dict(reference_data.union_names)
+            if union_labels:
+                union_labels[None] = "Ingen"
+            union_values = list(union_labels)
 
-        if role_options and sector_options and union_options:
-            selected_roles = st.multiselect(
-                "Vælg rolle(r)",
-                options=role_values,
-                format_func=lambda x: next(label for val, label in role_options if val == x),
-                key="role_select"
-            )
-            selected_sectors = st.multiselect(
-                "Vælg sektor(er)",
-                options=sector_values,
-                format_func=lambda x: next(label for val, label in sector_options if val == x),
-                key="sector_select"
-            )
-
-            include_unions = st.toggle("Inkluder fagforening", value=False, key="include_unions_toggle")
+            in_system_labels = {None: "Alle", True: "I systemet", False: "Ikke i systemet"}
+            in_system_values = list(in_system_labels)
 
-            if include_unions:
-                selected_unions = st.multiselect(
-                    "Vælg fagforening(er)",
-                    options=union_values,
-                    format_func=lambda x: next(label for val, label in union_options if val == x),
-                    key="union_select"
+            if role_values and sector_values and union_values:
+                selected_roles = st.multiselect(
+                    "Vælg rolle(r)",
+                    options=role_values,
+                    format_func=lambda x: role_labels[x],
+                    key="role_select"
+                )
+                selected_sectors = st.multiselect(
+                    "Vælg sektor(er)",
+                    options=sector_values,
+                    format_func=lambda x: sector_labels[x],
+                    key="sector_select"
                 )
 
-            selected_in_system = st.selectbox(
-                "Findes i systemet",
-                options=in_system_values,
-                format_func=lambda x: next(label for val, label in in_system_options if val == x),
-                key="in_system_select"
-            )
+                include_unions = st.toggle("Inkluder fagforening", value=False, key="include_unions_toggle")
 
-            if st.button("Generer udtræk", key="generate_export"):
-                with st.spinner("Henter data..."):
-                    all_with_roles = meddb.get_persons_by_roles_and_top_committees(role_ids=selected_roles, top_committee_ids=selected_sectors, union_ids=selected_unions if include_unions else None, in_system=selected_in_system)
-                    if all_with_roles:
-                        mapped_persons = []
-                        for p in all_with_roles:
-                            roles = list({m.role.name for m in p.committee_memberships if m.role})
-                            top_sectors = set()
-                            for m in p.committee_memberships:
-                                # Skip if no committee or committee is the root (id=1)
-                                committee = meddb.get_committee_by_id(m.committee_id)
-                                if committee and committee.id != 1:
-                                    current = committee
-                                    parent_id = current.parent_id
-                                    while parent_id and parent_id != 1:
-                                        current = meddb.get_committee_by_id(parent_id)
-                                        parent_id = current.parent_id
-                                    if current.id != 1 and current.name not in top_sectors:
-                                        sector_name = current.name
-                                        if sector_name.startswith("SEKTOR - "):
-                                            sector_name = sector_name.replace("SEKTOR - ", "")
-                                        top_sectors.add(sector_name)
-                            row = {
-                                "Navn": p.name,
-                                "Email": p.email,
-                                "Org. Enhed": p.organization,
-                                "Rolle(r)": ", ".join(roles) if roles else None,
-                                "Sektor(er)": ", ".join(list(set(top_sectors))) if top_sectors else None,
-                                "I systemet": "Ja" if p.found_in_system else "Nej"
-                            }
-                            if include_unions:
-                                row["Fagforening"] = p.union.name if p.union else None
-                            mapped_persons.append(row)
-                        df = pd.DataFrame(mapped_persons)
-                        excel_buffer = BytesIO()
-                        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                            df.to_excel(writer, index=False, sheet_name="MED data")
-                            worksheet = writer.sheets["MED data"]
-                            # Set width to at least the length of the column name + 2
-                            for idx, col in enumerate(df.columns):
-                                width = max(df[col].astype(str).map(len).max() if not df.empty else 0, len(col)) + 2
-                                worksheet.set_column(idx, idx, width)
-                        excel_buffer.seek(0)
-                        st.session_state['excel_buffer'] = excel_buffer.getvalue()
-                    else:
-                        st.session_state.pop('excel_buffer', None)
-                        st.info("Ingen fundet")
-
-        if 'excel_buffer' in st.session_state:
-            st.download_button(
-                label="Download Excel-fil",
-                data=st.session_state['excel_buffer'],
-                file_name="MED_data.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                type="primary"
-            )
+                if include_unions:
+                    selected_unions = st.multiselect(
+                        "Vælg fagforening(er)",
+                        options=union_values,
+                        format_func=lambda x: union_labels[x],
+                        key="union_select"
+                    )
 
-    # Admin section (Committees, Roles, Unions)
-    if 'edit_udvalg' in user_roles and edit_mode:
-        st.subheader("Administrer udvalg, roller og fagforeninger")
-        tabs_items = ['Udvalg', "Roller", 'Fagforeninger']
-        tabs = sac.tabs(
-            items=tabs_items,
-            align='center',
-            use_container_width=True
-        )
-        if tabs == 'Udvalg':
-            with st.expander("Opret nyt udvalg"):
-                create_committee_form(
-                    get_all_func=meddb.get_committees,
-                    get_all_types_func=meddb.get_all_committee_types,
-                    create_func=meddb.create_committee
+                selected_in_system = st.selectbox(
+                    "Findes i systemet",
+                    options=in_system_values,
+                    format_func=lambda x: in_system_labels[x],
+                    key="in_system_select"
                 )
-            with st.expander("Opret ny udvalgstype"):
-                create_form(type_name='udvalgstype', create_func=meddb.create_committee_type)
-            with st.expander("Rediger udvalgstype"):
-                edit_name_form(type_name='udvalgstype', get_all_func=meddb.get_all_committee_types, update_func=meddb.update_committee_type)
-            with st.expander("Slet udvalgstype"):
-                delete_form(type_name='udvalgstype', get_all_func=meddb.get_all_committee_types, delete_func=meddb.delete_committee_type)
-        elif tabs == 'Roller':
-            create_form(type_name='rolle', create_func=meddb.create_role)
-            with st.expander("Rediger rolle"):
-                edit_name_form(type_name='Rolle', get_all_func=meddb.get_all_roles, update_func=meddb.update_role)
-            with st.expander("Slet rolle"):
-                delete_form(type_name='rolle', get_all_func=meddb.get_all_roles, delete_func=meddb.delete_role)
-        elif tabs == 'Fagforeninger':
-            with st.expander("Opret ny fagforening"):
-                create_union_form(create_func=meddb.create_union)
-            with st.expander("Rediger fagforening"):
-                union_options = [(u.id, u.name) for u in meddb.get_all_unions()]
-                union_values = [opt[0] for opt in union_options]
-                union_to_edit = st.selectbox(
-                    "Vælg fagforening at redigere",
-                    options=union_values,
-                    format_func=lambda x: next(label for val, label in union_options if val == x),
-                    key="edit_union_select"
+
+                if st.button("Generer udtræk", key="generate_export"):
+                    with st.spinner("Henter data..."):
+                        export_columns = ["Navn", "Email", "Org. Enhed", "Rolle(r)", "Sektor(er)", "I systemet"] + (["Fagforening"] if include_unions else [])
+
+                        def _export_rows():
+                            """Helper function to map export rows to Excel rows as they are read from the database."""
+                            for p in meddb.iter_persons_export(role_ids=selected_roles, top_committee_ids=selected_sectors, union_ids=selected_unions if include_unions else None, in_system=selected_in_system):
+                                top_sectors = {sector.replace("SEKTOR - ", "") if sector.startswith("SEKTOR - ") else sector for sector in p.sectors}
+                                row = [
+                                    p.name,
+                                    p.email,
+                                    p.organization,
+                                    ", ".join(p.roles) if p.roles else None,
+                                    ", ".join(sorted(top_sectors)) if top_sectors else None,
+                                    "Ja" if p.found_in_system else "Nej"
+                                ]
+                                if include_unions:
+                                    row.append(p.union_name)
+                                yield row
+
+                        # Only the file path is kept in the session, the workbook itself is streamed to disk
+                        remove_export_file(st.session_state.pop('export_file', None))
+                        export_file = create_export_file(sheet_name="MED data", columns=export_columns, rows=_export_rows())
+                        if export_file:
+                            st.session_state['export_file'] = export_file
+                        else:
+                            st.info("Ingen fundet")
+
+            export_file = st.session_state.get('export_file')
+            if export_file and os.path.exists(export_file):
+                st.download_button(
+                    label="Download Excel-fil",
+                    data=partial(_read_file, path=export_file),
+                    file_name="MED_data.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    type="primary"
                 )
-                if union_to_edit:
-                    edit_union_form(
-                        id=union_to_edit,
-                        get_func=meddb.get_union_by_id,
-                        update_func=meddb.update_union
+            elif export_file:
+                st.session_state.pop('export_file', None)
+
+        # Admin section (Committees, Roles, Unions)
+        if 'edit_udvalg' in user_roles and edit_mode:
+            st.subheader("Administrer udvalg, roller og fagforeninger")
+            tabs_items = ['Udvalg', "Roller", 'Fagforeninger'] + (['Import'] if 'edit_member' in user_roles else [])
+            tabs = sac.tabs(
+                items=tabs_items,
+                align='center',
+                use_container_width=True
+            )
+            if tabs == 'Udvalg':
+                with st.expander("Opret nyt udvalg"):
+                    create_committee_form(
+                        get_all_func=meddb.get_committees,
+                        get_all_types_func=meddb.get_all_committee_types,
+                        create_func=meddb.create_committee
                     )
-            with st.expander("Slet fagforening"):
-                delete_form(type_name='fagforening', get_all_func=meddb.get_all_unions, delete_func=meddb.delete_union)
+                with st.expander("Flyt flere udvalg"):
+                    move_committees_form(get_all_func=meddb.get_committees, move_func=meddb.move_committee_subtrees)
+                with st.expander("Opret ny udvalgstype"):
+                    create_form(type_name='udvalgstype', create_func=meddb.create_committee_type)
+                with st.expander("Rediger udvalgstype"):
+                    edit_name_form(type_name='udvalgstype', get_all_func=meddb.get_all_committee_types, update_func=meddb.update_committee_type)
+                with st.expander("Slet udvalgstype"):
+                    delete_form(type_name='udvalgstype', get_all_func=meddb.get_all_committee_types, delete_func=meddb.delete_committee_type)
+            elif tabs == 'Roller':
+                create_form(type_name='rolle', create_func=meddb.create_role)
+                with st.expander("Rediger rolle"):
+                    edit_name_form(type_name='Rolle', get_all_func=meddb.get_all_roles, update_func=meddb.update_role)
+                with st.expander("Slet rolle"):
+                    delete_form(type_name='rolle', get_all_func=meddb.get_all_roles, delete_func=meddb.delete_role)
+            elif tabs == 'Fagforeninger':
+                with st.expander("Opret ny fagforening"):
+                    create_union_form(create_func=meddb.create_union)
+                with st.expander("Rediger fagforening"):
+                    union_labels = meddb.get_reference_data().union_names
+                    union_to_edit = st.selectbox(
+                        "Vælg fagforening at redigere",
+                        options=list(union_labels),
+                        format_func=lambda x: union_labels[x],
+                        key="edit_union_select"
+                    )
+                    if union_to_edit:
+                        edit_union_form(
+                            id=union_to_edit,
+                            get_func=meddb.get_union_by_id,
+                            update_func=meddb.update_union
+                        )
+                with st.expander("Slet fagforening"):
+                    delete_form(type_name='fagforening', get_all_func=meddb.get_all_unions, delete_func=meddb.delete_union)
+            elif tabs == 'Import':
+                required_columns = ", ".join(IMPORT_COLUMNS[key] for key in REQUIRED_COLUMNS)
+                optional_columns = ", ".join(label for key, label in IMPORT_COLUMNS.items() if key not in REQUIRED_COLUMNS)
+                st.write(
+                    f"Importér medlemskaber fra en CSV- eller Excel-fil med kolonnerne {required_columns} og eventuelt {optional_columns}. "
+                    "Udvalg, roller og fagforeninger skal findes i forvejen."
+                )
+                import_file = st.file_uploader("Vælg fil", type=["csv", "xlsx"], key="import_file")
+                if import_file:
+                    try:
+                        import_rows = read_membership_file(import_file, file_name=import_file.name)
+                    except ValueError as e:
+                        st.error(f"Filen kunne ikke læses: {e}")
+                        st.stop()
+
+                    col_check, col_import = st.columns(2)
+                    run_check = col_check.button("Kontrollér", key="import_check")
+                    run_import = col_import.button("Importér", key="import_run", type="primary")
+                    if run_check or run_import:
+                        try:
+                            with st.spinner("Importerer..." if run_import else "Kontrollerer..."):
+                                report = meddb.bulk_import_memberships(import_rows, dry_run=run_check)
+                        except ValueError:
+                            st.error("Importen er ikke mulig, da databasens unikke indeks på e-mail mangler, typisk fordi flere personer har samme e-mail. Kontakt en administrator.")
+                            st.stop()
+
+                        if report.dry_run:
+                            st.info(f"{report.valid_rows} af {report.rows} rækker kan importeres.")
+                        else:
+                            st.success(
+                                f"{report.memberships_created} medlemskaber oprettet, {report.memberships_existing} fandtes i forvejen. "
+                                f"{report.persons_created} personer oprettet, {report.persons_updated} opdateret."
+                            )
+                        if report.errors:
+                            st.warning(f"{len(report.errors)} rækker blev ikke importeret.")
+                            st.dataframe(
+                                {"Række": [e.row_number for e in report.errors], "Fejl": [e.message for e in report.errors]},
+                                hide_index=True
+                            )
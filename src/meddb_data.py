@@ -1,33 +1,93 @@
+import json
 import logging
+import threading
+import uuid
+from collections import deque
+from collections.abc import Iterator
 
-from sqlalchemy import select, text
+from sqlalchemy import all_, delete, func, insert, inspect, literal, literal_column, or_, select, text, true, union_all, update
+from sqlalchemy.dialects.postgresql import array, insert as pg_insert
 from sqlalchemy.orm import joinedload, aliased
 
-from models import Base, Committee, CommitteeType, CommitteeMembership, Person, Role, Union
+from committee_tree import CommitteeChange, CommitteeTree
+from membership_import import MembershipImportError, MembershipImportReport, MembershipImportRow
+from models import Base, Committee, CommitteeClosure, CommitteeType, CommitteeMembership, Person, Role, Union
+from read_models import CommitteeMemberRow, CommitteePage, NamedItem, PersonExportRow, ReferenceData
+from utils.change_listener import ChangeListener
+from utils.config import ROOT_COMMITTEE_ID
+from utils.metrics import MEDDB_METHOD_SECONDS, instrument_methods
 
 
 logger = logging.getLogger(__name__)
 
+# Key of the PostgreSQL advisory lock held while the committee hierarchy is changed
+HIERARCHY_LOCK_KEY = 4711
+# Number of committee changes kept for get_committee_changes, older versions get a full tree rebuild
+COMMITTEE_CHANGE_LOG_SIZE = 1000
+# Most committee IDs sent in one change notification, more bump all membership versions instead, keeping the payload below PostgreSQL's 8000 byte limit
+NOTIFY_MAX_IDS = 500
 
+
+@instrument_methods(MEDDB_METHOD_SECONDS)
 class MeddbData:
     """
     Class for managing MedDB data operations using SQLAlchemy ORM and DatabaseClient.
     """
-    def __init__(self, db_client, schema):
+    def __init__(self, db_client, schema, change_notifications: bool = False):
         """
         Initialize the MeddbData class by setting up the database client and creating necessary schemas and tables, as well as seeding initial data.
+
+        :param change_notifications: Publish cache invalidations with PostgreSQL NOTIFY and apply those of other processes, so several replicas can share
+            the database without serving stale caches. Default is False.
+        :type change_notifications: bool
         """
         self.db_client = db_client
         self.schema = schema
 
+        # Identifies this instance's own notifications, which it has already applied
+        self._instance_id = uuid.uuid4().hex
+        self._change_channel = f"{schema}_changes"
+        self._change_listener: ChangeListener | None = None
+
+        # Process-wide committee tree cache, invalidated by committee and committee type writes
+        self._tree_lock = threading.Lock()
+        self._tree_version = 0
+        self._tree_cache: CommitteeTree | None = None
+        # (tree version, change) pairs, where None marks a change that is only known as a whole, e.g. a committee type rename
+        self._committee_changes: deque[tuple[int, CommitteeChange | None]] = deque(maxlen=COMMITTEE_CHANGE_LOG_SIZE)
+        # Held by committee writes from before their commit until their changes are recorded, so changes are recorded in commit order
+        self._committee_write_lock = threading.Lock()
+
+        # Process-wide cache of roles, unions and committee types, invalidated by their create, update and delete methods
+        self._reference_lock = threading.Lock()
+        self._reference_version = 0
+        self._reference_cache: ReferenceData | None = None
+
+        # Versions of the member data shown for a committee, used as cache keys e.g. for member downloads
+        self._version_lock = threading.Lock()
+        self._member_data_version = 0  # bumped by person, role and union changes, which can affect any committee
+        self._committee_member_versions: dict[int, int] = {}
+
         with self.db_client.get_session() as session:
             session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema}"))
             session.commit()
 
         # Ensure tables are created in the correct schema
         Base.metadata.create_all(self.db_client.get_engine())
+        # create_all skips indexes on tables that already exist
+        self._ensure_indexes()
 
         self._seed_db()
+        self._ensure_committee_closure()
+
+        if change_notifications:
+            self._change_listener = ChangeListener(
+                connect=self.db_client.get_dedicated_connection,
+                channel=self._change_channel,
+                on_notify=self._apply_change_notification,
+                on_reconnect=self._invalidate_all_caches
+            )
+            self._change_listener.start()
 
     def _seed_db(self):
         """Seed the database with initial data for committee types. if they do not already exist."""
@@ -50,24 +110,196 @@ class MeddbData:
                 session.add_all(to_create)
                 session.commit()
 
-    # GET operations
-    def get_all_committee_types(self, include_protected: bool = False) -> list[CommitteeType]:
-        """Retrieve all committee types, optionally including protected ones."""
-        with self.db_client.get_session() as session:
-            query = session.query(CommitteeType)
-            if not include_protected:
-                return query.filter(CommitteeType.is_protected.is_(False)).all()
-            return query.all()
+    # Indexes
+    def _ensure_indexes(self) -> None:
+        """Create indexes declared on the models that are missing in the database, and log any that could not be created."""
+        engine = self.db_client.get_engine()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=engine, checkfirst=True)
+                except Exception as e:
+                    logger.error(f"Error creating index {index.name}: {e}")
+
+        missing = self.get_missing_indexes()
+        if missing:
+            logger.warning(f"Missing database indexes: {', '.join(missing)}")
+
+    def get_missing_indexes(self) -> list[str]:
+        """Return the names of indexes declared on the models that do not exist in the database, e.g. a unique email index blocked by duplicate emails."""
+        inspector = inspect(self.db_client.get_engine())
+        missing = []
+        for table in Base.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name, schema=table.schema)}
+            missing.extend(index.name for index in table.indexes if index.name not in existing)
+        return missing
+
+    # Committee closure table
+    def _ensure_committee_closure(self) -> None:
+        """
+        Rebuild the committee closure table if it does not match the committee hierarchy, e.g. on first start after it was introduced.
+        A hierarchy with parent cycles, which older versions allowed, is logged and left for an administrator to fix, as it has no valid closure.
+        """
+        cycles = self.find_committee_cycles()
+        if cycles:
+            logger.error(f"Committee hierarchy has parent cycles through committees {cycles}, the closure table is not checked or rebuilt until they are fixed")
+            return
+        mismatches = self.check_committee_closure()
+        if mismatches:
+            logger.warning(f"Committee closure table has {mismatches} mismatching rows, rebuilding")
+            self.rebuild_committee_closure()
+
+    def _expected_closure_cte(self):
+        """
+        Recursive CTE yielding the ancestor/descendant pairs the closure table should hold, computed from Committee.parent_id.
+        Each row carries the path of IDs from the ancestor, and a committee already on the path is not visited again, so parent cycles cannot make it recurse forever.
+        """
+        paths_cte = (
+            select(
+                Committee.id.label("ancestor_id"),
+                Committee.id.label("descendant_id"),
+                literal(0).label("depth"),
+                array([Committee.id]).label("path"),
+            )
+            .cte(name="paths", recursive=True)
+        )
 
-    def get_all_roles(self) -> list[Role]:
-        """Retrieve all roles."""
-        with self.db_client.get_session() as session:
-            return session.query(Role).all()
+        C = aliased(Committee)
+        return paths_cte.union_all(
+            select(paths_cte.c.ancestor_id, C.id, paths_cte.c.depth + 1, paths_cte.c.path + array([C.id]))
+            .where(C.parent_id == paths_cte.c.descendant_id, C.id != all_(paths_cte.c.path))
+        )
 
-    def get_all_unions(self) -> list[Union]:
-        """Retrieve all unions."""
+    def find_committee_cycles(self) -> list[int]:
+        """Return the IDs of committees that are their own ancestor through parent_id, an empty list when the hierarchy is a forest."""
+        with self.db_client.get_session() as session:
+            paths_cte = self._expected_closure_cte()
+            # A committee is in a cycle if its parent is one of its own descendants
+            return list(session.scalars(
+                select(paths_cte.c.ancestor_id)
+                .join(Committee, Committee.id == paths_cte.c.ancestor_id)
+                .where(Committee.parent_id == paths_cte.c.descendant_id)
+                .distinct()
+                .order_by(paths_cte.c.ancestor_id)
+            ))
+
+    def check_committee_closure(self) -> int:
+        """Compare the closure table with the committee hierarchy. Returns the number of missing plus superfluous rows, 0 when consistent."""
         with self.db_client.get_session() as session:
-            return session.query(Union).all()
+            expected_cte = self._expected_closure_cte()
+            expected = select(expected_cte.c.ancestor_id, expected_cte.c.descendant_id, expected_cte.c.depth)
+            actual = select(CommitteeClosure.ancestor_id, CommitteeClosure.descendant_id, CommitteeClosure.depth)
+
+            missing = session.scalar(select(func.count()).select_from(expected.except_(actual).subquery()))
+            superfluous = session.scalar(select(func.count()).select_from(actual.except_(expected).subquery()))
+            return missing + superfluous
+
+    def rebuild_committee_closure(self) -> None:
+        """Recreate the closure table from Committee.parent_id in a single transaction. Raises ValueError if the hierarchy has parent cycles."""
+        cycles = self.find_committee_cycles()
+        if cycles:
+            raise ValueError(f"Committee hierarchy has parent cycles through committees {cycles}.")
+        with self.db_client.get_session() as session:
+            expected_cte = self._expected_closure_cte()
+            session.execute(delete(CommitteeClosure))
+            session.execute(
+                insert(CommitteeClosure).from_select(
+                    ["ancestor_id", "descendant_id", "depth"],
+                    select(expected_cte.c.ancestor_id, expected_cte.c.descendant_id, expected_cte.c.depth),
+                )
+            )
+            session.commit()
+
+    def _attach_closure_subtree(self, session, committee_id: int, parent_id: int) -> None:
+        """Add closure rows linking the parent and all its ancestors to every committee in the subtree of committee_id."""
+        P = aliased(CommitteeClosure)
+        S = aliased(CommitteeClosure)
+        session.execute(
+            insert(CommitteeClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(P.ancestor_id, S.descendant_id, P.depth + S.depth + 1)
+                .select_from(P)
+                .join(S, true())  # Every ancestor of the parent is paired with every committee in the subtree
+                .where(P.descendant_id == parent_id, S.ancestor_id == committee_id),
+            )
+        )
+
+    def _detach_closure_subtree(self, session, committee_id: int) -> None:
+        """Remove closure rows linking the ancestors of committee_id to any committee in its subtree."""
+        session.execute(
+            delete(CommitteeClosure)
+            .where(
+                CommitteeClosure.descendant_id.in_(
+                    select(CommitteeClosure.descendant_id).where(CommitteeClosure.ancestor_id == committee_id).scalar_subquery()
+                ),
+                CommitteeClosure.ancestor_id.in_(
+                    select(CommitteeClosure.ancestor_id)
+                    .where(CommitteeClosure.descendant_id == committee_id, CommitteeClosure.ancestor_id != committee_id)
+                    .scalar_subquery()
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    # GET operations
+    def get_all_committee_types(self, include_protected: bool = False) -> list[NamedItem]:
+        """Retrieve all committee types from the reference data cache, optionally including protected ones."""
+        reference = self.get_reference_data()
+        return [item for item in reference.committee_types if include_protected or item.id not in reference.protected_committee_type_ids]
+
+    def get_all_roles(self) -> list[NamedItem]:
+        """Retrieve all roles from the reference data cache."""
+        return list(self.get_reference_data().roles)
+
+    def get_all_unions(self) -> list[NamedItem]:
+        """Retrieve all unions from the reference data cache."""
+        return list(self.get_reference_data().unions)
+
+    def get_reference_data(self) -> ReferenceData:
+        """
+        Get roles, unions and committee types with ID to name dictionaries.
+        The snapshot is served from the process-wide cache unless one of them has changed since it was built, and must not be modified.
+        """
+        reference = self._reference_cache
+        if reference is not None and reference.version == self._reference_version:
+            return reference
+
+        with self._reference_lock:
+            reference = self._reference_cache
+            version = self._reference_version
+            if reference is not None and reference.version == version:
+                return reference
+
+            items: dict[str, list[NamedItem]] = {"role": [], "union": [], "committee_type": []}
+            protected_ids = set()
+            with self.db_client.get_session() as session:
+                query = union_all(
+                    select(literal("role").label("kind"), Role.id, Role.name, literal(False).label("is_protected")),
+                    select(literal("union"), Union.id, Union.name, literal(False)),
+                    select(literal("committee_type"), CommitteeType.id, CommitteeType.name, CommitteeType.is_protected),
+                )
+                for kind, item_id, name, is_protected in session.execute(query):
+                    items[kind].append(NamedItem(id=item_id, name=name))
+                    if is_protected:
+                        protected_ids.add(item_id)
+
+            reference = ReferenceData(
+                version=version,
+                roles=tuple(sorted(items["role"], key=lambda item: item.id)),
+                unions=tuple(sorted(items["union"], key=lambda item: item.id)),
+                committee_types=tuple(sorted(items["committee_type"], key=lambda item: item.id)),
+                protected_committee_type_ids=frozenset(protected_ids),
+            )
+            self._reference_cache = reference
+            return reference
+
+    def _invalidate_reference_data(self, broadcast: bool = True) -> None:
+        """Mark the cached reference data as stale, and unless broadcast is False, in other processes too."""
+        with self._reference_lock:
+            self._reference_version += 1
+            self._reference_cache = None
+        if broadcast:
+            self._notify_change(entity="reference_data")
 
     def get_union_by_id(self, union_id: int) -> Union | None:
         """Retrieve a union by its ID."""
@@ -114,39 +346,115 @@ class MeddbData:
                 .join(Person.committee_memberships)
             )
 
-            if in_system is not None:
-                q = q.filter(Person.found_in_system == in_system)
+            q = self._filter_persons(q, role_ids=role_ids, top_committee_ids=top_committee_ids, union_ids=union_ids, in_system=in_system)
 
-            if union_ids:
-                if None in union_ids:
-                    q = q.filter(
-                        (Person.union_id.in_([uid for uid in union_ids if uid is not None])) | (Person.union_id.is_(None))
-                    )
-                else:
-                    q = q.filter(Person.union_id.in_(union_ids))
+            q = q.distinct()
 
-            if role_ids:
-                q = q.filter(CommitteeMembership.role_id.in_(role_ids))
+            return q.all()
 
-            if top_committee_ids:
-                descendants_cte = (
-                    select(Committee.id)
-                    .where(Committee.id.in_(top_committee_ids))
-                    .cte(name="descendants", recursive=True)
+    def _filter_persons(self, q, role_ids: list[int], top_committee_ids: list[int], union_ids: list[int] | None, in_system: bool | None):
+        """Apply the role, top committee, union and system status filters to a person query joined with committee memberships."""
+        if in_system is not None:
+            q = q.filter(Person.found_in_system == in_system)
+
+        if union_ids:
+            if None in union_ids:
+                q = q.filter(
+                    (Person.union_id.in_([uid for uid in union_ids if uid is not None])) | (Person.union_id.is_(None))
                 )
+            else:
+                q = q.filter(Person.union_id.in_(union_ids))
+
+        if role_ids:
+            q = q.filter(CommitteeMembership.role_id.in_(role_ids))
 
-                C = aliased(Committee)
-                descendants_cte = descendants_cte.union_all(
-                    select(C.id).where(C.parent_id == descendants_cte.c.id)
+        if top_committee_ids:
+            q = q.filter(
+                CommitteeMembership.committee_id.in_(
+                    select(CommitteeClosure.descendant_id).where(CommitteeClosure.ancestor_id.in_(top_committee_ids))
                 )
+            )
 
-                q = q.filter(
-                    CommitteeMembership.committee_id.in_(select(descendants_cte.c.id))
+        return q
+
+    def get_persons_export(self, role_ids: list[int], top_committee_ids: list[int], union_ids: list[int] | None = None, in_system: bool | None = None) -> list[PersonExportRow]:
+        """
+        Retrieve the "Dataudtræk" export rows for persons matching the given filters, see iter_persons_export.
+        Prefer iter_persons_export for large exports, as this holds all rows in memory.
+        """
+        return list(self.iter_persons_export(role_ids=role_ids, top_committee_ids=top_committee_ids, union_ids=union_ids, in_system=in_system))
+
+    def iter_persons_export(self, role_ids: list[int], top_committee_ids: list[int], union_ids: list[int] | None = None, in_system: bool | None = None,
+                            chunk_size: int = 500) -> Iterator[PersonExportRow]:
+        """
+        Yield the "Dataudtræk" export rows for persons matching the given filters, see get_persons_by_roles_and_top_committees.
+        Each row holds all roles of the person and the sectors (children of the root committee) of all their memberships.
+        Persons are read in chunks of chunk_size ordered by ID, using three queries per chunk. Unless a unit of work is active, see
+        DatabaseClient.start_unit_of_work, no session or connection is held while rows are consumed.
+        """
+        last_id = 0
+        while True:
+            with self.db_client.get_session() as session:
+                id_query = (
+                    session.query(Person.id)
+                    .join(Person.committee_memberships)
+                    .filter(Person.id > last_id)
+                )
+                id_query = self._filter_persons(id_query, role_ids=role_ids, top_committee_ids=top_committee_ids, union_ids=union_ids, in_system=in_system)
+                ids = [person_id for (person_id,) in id_query.distinct().order_by(Person.id).limit(chunk_size).all()]
+                if not ids:
+                    return
+
+                persons = (
+                    session.query(Person)
+                    .options(
+                        joinedload(Person.union),
+                        joinedload(Person.committee_memberships).joinedload(CommitteeMembership.role),
+                    )
+                    .filter(Person.id.in_(ids))
+                    .order_by(Person.id)
+                    .all()
                 )
 
-            q = q.distinct()
+            sector_names = self._get_sector_names(committee_ids={m.committee_id for p in persons for m in p.committee_memberships})
+            for p in persons:
+                yield PersonExportRow(
+                    name=p.name,
+                    email=p.email,
+                    organization=p.organization,
+                    found_in_system=p.found_in_system,
+                    union_name=p.union.name if p.union else None,
+                    roles=sorted({m.role.name for m in p.committee_memberships if m.role}),
+                    sectors=sorted({sector_names[m.committee_id] for m in p.committee_memberships if m.committee_id in sector_names}),
+                )
 
-            return q.all()
+            if len(ids) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    def _get_sector_names(self, committee_ids: set[int]) -> dict[int, str]:
+        """
+        Map each committee ID to the name of its sector in a single query on the closure table.
+        The sector is the ancestor directly below the root committee, or the top ancestor for committees outside the root's tree.
+        The root committee itself has no sector.
+        """
+        if not committee_ids:
+            return {}
+
+        with self.db_client.get_session() as session:
+            rows = session.execute(
+                select(CommitteeClosure.descendant_id, Committee.name)
+                .join(Committee, Committee.id == CommitteeClosure.ancestor_id)
+                .where(
+                    CommitteeClosure.descendant_id.in_(committee_ids),
+                    or_(
+                        Committee.parent_id == ROOT_COMMITTEE_ID,
+                        Committee.parent_id.is_(None) & (Committee.id != ROOT_COMMITTEE_ID),
+                    ),
+                )
+            ).all()
+
+            return {committee_id: name for committee_id, name in rows}
 
     def get_committees(self) -> list[Committee]:
         """Retrieve all committees with their types."""
@@ -164,39 +472,161 @@ class MeddbData:
             return session.query(Committee).options(joinedload(Committee.type)).filter(Committee.parent_id == parent_id).all()
 
     def get_committee_tree(self) -> tuple[list[dict], dict[int, int | None], dict[int, dict]]:
-        """Get committees structured as a tree for hierarchical representation using streamlit_tree_select."""
-        committees = self.get_committees()
-
-        node_map: dict[int, dict] = {}
-        parent_map: dict[int, int | None] = {}
-
-        for c in committees:
-            node_map[c.id] = {
-                "label": c.name,
-                "value": c.id,
-                "className": c.type.name if c.type else None,
-            }
-            parent_map[c.id] = c.parent_id
-
-        roots = []
-        for c in committees:
-            if c.parent_id is None:
-                roots.append(node_map[c.id])
-            else:
-                parent_node = node_map.get(c.parent_id)
-                if parent_node:
-                    parent_node.setdefault("children", []).append(node_map[c.id])
+        """
+        Get committees structured as a tree for hierarchical representation using streamlit_tree_select.
+        The tree is served from the process-wide cache unless a committee or committee type has changed since it was built.
+        The returned structures are shared between sessions and must not be modified.
+        """
+        tree = self._get_cached_tree()
+        return tree.roots, tree.parent_map, tree.node_map
+
+    def search_committees(self, query: str) -> list[dict]:
+        """
+        Search committee names in the cached tree, see CommitteeSearchIndex.search. The index is built once per tree version.
+        The returned nodes are shared between sessions and must not be modified.
+        """
+        return self._get_cached_tree().search_index.search(query)
+
+    def get_tree_version(self) -> int:
+        """Get the current version of the committee tree data. The version increases on every committee or committee type change."""
+        return self._tree_version
 
-        def sort_nodes(nodes: list[dict]) -> list[dict]:
-            """Sort nodes so that parents come before children, and alphabetically by label."""
-            nodes.sort(key=lambda x: (0 if x.get("children") else 1, x["label"]))
-            for node in nodes:
-                children = node.get("children")
-                if children:
-                    sort_nodes(children)
-            return nodes
+    def get_committee_changes(self, since_version: int) -> list[CommitteeChange] | None:
+        """
+        Get the committee changes made after since_version, a version from get_tree_version, in the order they were made.
 
-        return sort_nodes(roots), parent_map, node_map
+        :param since_version: Tree version the changes should bring up to date.
+        :type since_version: int
+        :return: The changes, or None if they are not all known, e.g. because the version is too old or the tree was invalidated as a whole,
+            in which case the tree has to be rebuilt.
+        :rtype: list[CommitteeChange] | None
+        """
+        with self._tree_lock:
+            return self._get_committee_changes_locked(since_version)
+
+    def _get_committee_changes_locked(self, since_version: int) -> list[CommitteeChange] | None:
+        """get_committee_changes for callers holding _tree_lock."""
+        if since_version == self._tree_version:
+            return []
+        if since_version > self._tree_version or not self._committee_changes or self._committee_changes[0][0] > since_version + 1:
+            return None
+        changes = [change for version, change in self._committee_changes if version > since_version]
+        if any(change is None for change in changes):
+            return None
+        return changes
+
+    def _get_cached_tree(self) -> CommitteeTree:
+        """Return the cached committee tree, applying the changes made since it was built, or rebuilding it if they are not all known."""
+        tree = self._tree_cache
+        if tree is not None and tree.version == self._tree_version:
+            return tree
+
+        with self._tree_lock:
+            tree = self._tree_cache
+            version = self._tree_version
+            if tree is not None and tree.version == version:
+                return tree
+
+            changes = self._get_committee_changes_locked(tree.version) if tree is not None else None
+            if changes is not None:
+                tree = tree.apply_changes(changes=changes, version=version)
+            else:
+                tree = CommitteeTree.from_committees(committees=self.get_committees(), version=version)
+            self._tree_cache = tree
+            return tree
+
+    def get_membership_version(self, committee_id: int) -> tuple[int, int]:
+        """Get a version stamp of the members of a committee. It changes whenever the committee's memberships, or the persons, roles or unions they show, change."""
+        return self._member_data_version, self._committee_member_versions.get(committee_id, 0)
+
+    def _bump_membership_version(self, committee_id: int | None = None, broadcast: bool = True) -> None:
+        """Bump the membership version of a single committee, or of all committees if committee_id is None, and unless broadcast is False, in other processes too."""
+        with self._version_lock:
+            if committee_id is None:
+                self._member_data_version += 1
+            else:
+                self._committee_member_versions[committee_id] = self._committee_member_versions.get(committee_id, 0) + 1
+        if broadcast:
+            self._notify_change(entity="membership", id=committee_id)
+
+    def _bump_membership_versions(self, committee_ids: list[int], broadcast: bool = True) -> None:
+        """Bump the membership versions of several committees, and unless broadcast is False, in other processes too with a single notification."""
+        with self._version_lock:
+            for committee_id in committee_ids:
+                self._committee_member_versions[committee_id] = self._committee_member_versions.get(committee_id, 0) + 1
+        if broadcast:
+            if len(committee_ids) > NOTIFY_MAX_IDS:
+                self._notify_change(entity="membership")
+            else:
+                self._notify_change(entity="membership", ids=list(committee_ids))
+
+    def _invalidate_committee_tree(self, broadcast: bool = True) -> None:
+        """Mark the cached committee tree as stale, so it is rebuilt, and unless broadcast is False, in other processes too."""
+        with self._tree_lock:
+            self._tree_version += 1
+            self._committee_changes.append((self._tree_version, None))
+            self._tree_cache = None
+        if broadcast:
+            self._notify_change(entity="committee_tree")
+
+    def _record_committee_changes(self, changes: list[CommitteeChange]) -> None:
+        """
+        Record committed committee changes, which the cached tree applies instead of being rebuilt.
+        Callers hold _committee_write_lock from before their commit, as changes applied in another order than they were committed can leave stale or orphaned nodes.
+        Other processes are told to invalidate their tree as a whole, as applying changes out of order with their own could make them diverge.
+        """
+        if not changes:
+            return
+        with self._tree_lock:
+            for change in changes:
+                self._tree_version += 1
+                self._committee_changes.append((self._tree_version, change))
+        self._notify_change(entity="committee_tree")
+
+    def _committee_change(self, kind: str, committee: Committee) -> CommitteeChange:
+        """Describe a created or updated committee for _record_committee_changes."""
+        type_name = self.get_reference_data().committee_type_names.get(committee.type_id)
+        return CommitteeChange(kind=kind, committee_id=committee.id, name=committee.name, type_name=type_name, parent_id=committee.parent_id)
+
+    def _invalidate_all_caches(self) -> None:
+        """Mark all cached data as stale in this process, e.g. after notifications from other processes may have been missed."""
+        self._invalidate_committee_tree(broadcast=False)
+        self._invalidate_reference_data(broadcast=False)
+        self._bump_membership_version(broadcast=False)
+
+    def _notify_change(self, entity: str, id: int | None = None, ids: list[int] | None = None) -> None:
+        """
+        Tell other processes to invalidate a cache with a NOTIFY on the change channel, sent after the change is committed.
+        The change is already saved, so failures are logged rather than raised, and other processes catch up when their caches are next invalidated.
+        """
+        if self._change_listener is None:
+            return
+        message = {"entity": entity, "id": id, "origin": self._instance_id}
+        if ids is not None:
+            message["ids"] = ids
+        payload = json.dumps(message)
+        try:
+            with self.db_client.get_engine().begin() as connection:
+                connection.execute(select(func.pg_notify(self._change_channel, payload)))
+        except Exception as e:
+            logger.error(f"Error sending change notification {payload}: {e}")
+
+    def _apply_change_notification(self, payload: str) -> None:
+        """Invalidate the local cache named in a notification from another process."""
+        change = json.loads(payload)
+        if change.get("origin") == self._instance_id:
+            return
+        entity = change.get("entity")
+        if entity == "committee_tree":
+            self._invalidate_committee_tree(broadcast=False)
+        elif entity == "reference_data":
+            self._invalidate_reference_data(broadcast=False)
+        elif entity == "membership" and "ids" in change:
+            self._bump_membership_versions(change["ids"], broadcast=False)
+        elif entity == "membership":
+            self._bump_membership_version(committee_id=change.get("id"), broadcast=False)
+        else:
+            logger.warning(f"Unknown change notification: {payload}")
 
     def get_committee_members(self, committee_id: int, include_union: bool) -> list[CommitteeMembership]:
         """Retrieve committee members by committee ID with their associated persons and roles. If include_union is True, also load union names."""
@@ -216,6 +646,78 @@ class MeddbData:
             memberships = query.all()
             return memberships
 
+    def load_committee_page(self, committee_id: int, include_union: bool, editing: bool) -> CommitteePage | None:
+        """
+        Load everything the committee page needs: the committee and its members in one query, and when editing, the select box options from the reference
+        data and committee tree caches.
+
+        :param committee_id: ID of the committee.
+        :type committee_id: int
+        :param include_union: Whether to load the members' union names.
+        :type include_union: bool
+        :param editing: Whether to load roles, unions, committee types (including protected) and committees for the edit forms.
+        :type editing: bool
+        :return: The page read model, or None if the committee does not exist.
+        :rtype: CommitteePage | None
+        """
+        # Read before the members, so a concurrent change can only make the version newer than the data, never older
+        membership_version = self.get_membership_version(committee_id=committee_id)
+
+        with self.db_client.get_session() as session:
+            # One row per member, or a single row with empty member columns if there are none
+            query = (
+                select(
+                    Committee.id, Committee.name, Committee.type_id, CommitteeType.name.label("type_name"), Committee.parent_id,
+                    CommitteeMembership.person_id, CommitteeMembership.role_id, Person.name.label("person_name"), Person.email,
+                    Person.organization, Person.found_in_system, Role.name.label("role_name"),
+                    (Union.name if include_union else literal(None)).label("union_name"),
+                )
+                .select_from(Committee)
+                .outerjoin(CommitteeType, CommitteeType.id == Committee.type_id)
+                .outerjoin(CommitteeMembership, CommitteeMembership.committee_id == Committee.id)
+                .outerjoin(Person, Person.id == CommitteeMembership.person_id)
+                .outerjoin(Role, Role.id == CommitteeMembership.role_id)
+                .where(Committee.id == committee_id)
+            )
+            if include_union:
+                query = query.outerjoin(Union, Union.id == Person.union_id)
+            rows = session.execute(query).all()
+            if not rows:
+                return None
+
+            first = rows[0]
+            page = CommitteePage(
+                id=first.id,
+                name=first.name,
+                type_id=first.type_id,
+                type_name=first.type_name,
+                parent_id=first.parent_id,
+                membership_version=membership_version,
+                members=[
+                    CommitteeMemberRow(
+                        committee_id=row.id,
+                        person_id=row.person_id,
+                        role_id=row.role_id,
+                        name=row.person_name,
+                        email=row.email,
+                        organization=row.organization,
+                        found_in_system=row.found_in_system,
+                        role_name=row.role_name,
+                        union_name=row.union_name,
+                    )
+                    for row in rows if row.person_id is not None
+                ],
+            )
+
+        if editing:
+            reference = self.get_reference_data()
+            page.roles = list(reference.roles)
+            page.unions = list(reference.unions)
+            page.committee_types = list(reference.committee_types)
+            page.committees = sorted((NamedItem(id=node["value"], name=node["label"]) for node in self._get_cached_tree().node_map.values()), key=lambda item: item.id)
+
+        return page
+
     # POST/PUT operations
     def create_role(self, name: str) -> Role:
         """Create a new role with the given name."""
@@ -223,6 +725,7 @@ class MeddbData:
             role = Role(name=name)
             session.add(role)
             session.commit()
+            self._invalidate_reference_data()
             session.refresh(role)
             return role
 
@@ -232,6 +735,8 @@ class MeddbData:
             committee_type = CommitteeType(name=name)
             session.add(committee_type)
             session.commit()
+            self._invalidate_reference_data()
+            self._invalidate_committee_tree()
             session.refresh(committee_type)
             return committee_type
 
@@ -241,16 +746,25 @@ class MeddbData:
             union = Union(name=name, description=description)
             session.add(union)
             session.commit()
+            self._invalidate_reference_data()
             session.refresh(union)
             return union
 
     def create_committee(self, name: str, type_id: int, parent_id: int | None) -> Committee:
         """Create a new committee with the given name, type ID, and optional parent ID."""
-        with self.db_client.get_session() as session:
+        with self._committee_write_lock, self.db_client.get_session() as session:
             committee = Committee(name=name, type_id=type_id, parent_id=parent_id)
             session.add(committee)
+            session.flush()
+
+            session.add(CommitteeClosure(ancestor_id=committee.id, descendant_id=committee.id, depth=0))
+            session.flush()
+            if parent_id is not None:
+                self._attach_closure_subtree(session, committee_id=committee.id, parent_id=parent_id)
+
             session.commit()
             session.refresh(committee)
+            self._record_committee_changes([self._committee_change("created", committee)])
             return committee
 
     def create_committee_member(self, committee_id: int, person_id: int, role_id: int) -> CommitteeMembership:
@@ -263,15 +777,16 @@ class MeddbData:
             )
             session.add(membership)
             session.commit()
+            self._bump_membership_version(committee_id=committee_id)
             session.refresh(membership)
             session.refresh(membership, attribute_names=["role"])
             return membership
 
     def add_or_update_person(self, name: str, email: str, found_in_system: bool = True, organization: str | None = None,
                              username: str | None = None, union_id: int | None = None) -> Person:
-        """Add a new person or update an existing one based on email."""
+        """Add a new person or update an existing one based on email, matched case-insensitively."""
         with self.db_client.get_session() as session:
-            person = session.query(Person).filter_by(email=email).first()
+            person = session.query(Person).filter(func.lower(Person.email) == email.lower()).first()
             if person:
                 person.name = name
                 person.found_in_system = found_in_system
@@ -279,6 +794,7 @@ class MeddbData:
                 person.username = username if username is not None else person.username
                 person.union_id = union_id if union_id is not None else person.union_id
                 session.commit()
+                self._bump_membership_version()
                 session.refresh(person)
                 return person
             else:
@@ -292,29 +808,242 @@ class MeddbData:
                 )
                 session.add(person)
                 session.commit()
+                self._bump_membership_version()
                 session.refresh(person)
                 return person
 
+    def bulk_import_memberships(self, rows: list[MembershipImportRow], chunk_size: int | None = 1000, dry_run: bool = False) -> MembershipImportReport:
+        """
+        Import many memberships at once, e.g. from read_membership_file.
+        Committees, roles and unions are matched by name case-insensitively and must exist. Persons are matched by email case-insensitively and created or updated
+        like add_or_update_person, except that found_in_system is left unchanged. Existing memberships are skipped.
+        Invalid rows are reported and skipped, the rest are written with one INSERT ... ON CONFLICT for persons and one for memberships per chunk.
+
+        :param rows: Memberships to import.
+        :type rows: list[MembershipImportRow]
+        :param chunk_size: Rows per transaction. None writes all rows in a single transaction. Default is 1000.
+        :type chunk_size: int | None
+        :param dry_run: Only validate the rows, without writing anything. Default is False.
+        :type dry_run: bool
+        :return: Counts of created and existing rows, and an error per skipped row.
+        :rtype: MembershipImportReport
+        :raises ValueError: If the unique index on lower(email) is missing, which the person upsert needs as its conflict target.
+        """
+        if "ix_person_email_lower" in self.get_missing_indexes():
+            raise ValueError("The unique index ix_person_email_lower is missing, e.g. because of duplicate emails. Remove the duplicates and restart to create it.")
+
+        report = MembershipImportReport(rows=len(rows), dry_run=dry_run)
+
+        with self.db_client.get_session() as session:
+            committee_ids: dict[str, list[int]] = {}
+            for committee_id, name in session.execute(select(Committee.id, Committee.name)):
+                committee_ids.setdefault(name.strip().lower(), []).append(committee_id)
+        reference = self.get_reference_data()
+        role_ids = {item.name.strip().lower(): item.id for item in reference.roles}
+        union_ids = {item.name.strip().lower(): item.id for item in reference.unions}
+
+        valid = []
+        for row in rows:
+            committee_matches = committee_ids.get(row.committee.lower(), [])
+            if not row.name:
+                error = "Navn mangler."
+            elif "@" not in row.email:
+                error = f'Ugyldig e-mail "{row.email}".'
+            elif not committee_matches:
+                error = f'Udvalget "{row.committee}" findes ikke.'
+            elif len(committee_matches) > 1:
+                error = f'Der er flere udvalg med navnet "{row.committee}".'
+            elif row.role.lower() not in role_ids:
+                error = f'Rollen "{row.role}" findes ikke.'
+            elif row.union and row.union.lower() not in union_ids:
+                error = f'Fagforeningen "{row.union}" findes ikke.'
+            else:
+                valid.append((row, committee_matches[0], role_ids[row.role.lower()], union_ids.get(row.union.lower()) if row.union else None))
+                continue
+            report.errors.append(MembershipImportError(row_number=row.row_number, message=error))
+
+        report.valid_rows = len(valid)
+        if dry_run or not valid:
+            return report
+
+        chunks = [valid] if chunk_size is None else [valid[i:i + chunk_size] for i in range(0, len(valid), chunk_size)]
+        for chunk in chunks:
+            with self.db_client.get_session() as session:
+                try:
+                    created, updated, memberships_created, memberships_existing = self._import_membership_chunk(session, chunk)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    logger.error(f"Error importing memberships: {e}")
+                    report.errors.extend(MembershipImportError(row_number=row.row_number, message="Rækken kunne ikke gemmes.") for row, *_ in chunk)
+                    continue
+
+            report.persons_created += created
+            report.persons_updated += updated
+            report.memberships_created += memberships_created
+            report.memberships_existing += memberships_existing
+
+        self._bump_membership_version()
+        return report
+
+    def _import_membership_chunk(self, session, chunk: list[tuple[MembershipImportRow, int, int, int | None]]) -> tuple[int, int, int, int]:
+        """Upsert the persons and insert the memberships of validated import rows. Returns persons created and updated, and memberships created and existing."""
+        persons: dict[str, dict] = {}
+        for row, _, _, union_id in chunk:
+            # The first row of a person wins, a single INSERT ... ON CONFLICT cannot update the same row twice
+            persons.setdefault(row.email.lower(), {
+                "name": row.name,
+                "email": row.email,
+                "organization": row.organization,
+                "username": row.username,
+                "union_id": union_id,
+                "found_in_system": False,
+            })
+
+        person_insert = pg_insert(Person).values(list(persons.values()))
+        person_upsert = person_insert.on_conflict_do_update(
+            index_elements=[func.lower(Person.email)],
+            set_={
+                "name": person_insert.excluded.name,
+                "organization": func.coalesce(person_insert.excluded.organization, Person.organization),
+                "username": func.coalesce(person_insert.excluded.username, Person.username),
+                "union_id": func.coalesce(person_insert.excluded.union_id, Person.union_id),
+            },
+        ).returning(Person.id, Person.email, literal_column("xmax = 0"))  # xmax is 0 for inserted rows
+
+        person_ids = {}
+        created = 0
+        for person_id, email, inserted in session.execute(person_upsert):
+            person_ids[email.lower()] = person_id
+            created += bool(inserted)
+
+        memberships = list(dict.fromkeys(
+            (person_ids[row.email.lower()], role_id, committee_id) for row, committee_id, role_id, _ in chunk
+        ))
+        membership_insert = pg_insert(CommitteeMembership).values([
+            {"person_id": person_id, "role_id": role_id, "committee_id": committee_id}
+            for person_id, role_id, committee_id in memberships
+        ]).on_conflict_do_nothing().returning(CommitteeMembership.person_id)
+        memberships_created = len(session.execute(membership_insert).all())
+
+        return created, len(persons) - created, memberships_created, len(chunk) - memberships_created
+
     # PUT/UPDATE operations
     def update_committee(self, id: int, name: str | None = None, type_id: int | None = None,
                          parent_id: int | None = False) -> Committee:
         """Update a committee's name, type ID, or parent ID."""
-        with self.db_client.get_session() as session:
+        with self._committee_write_lock, self.db_client.get_session() as session:
             committee = session.get(Committee, id)
             if not committee:
                 raise ValueError("Committee not found.")
 
+            changes = []
             if name is not None:
                 committee.name = name
             if type_id is not None:
                 committee.type_id = type_id
-            if parent_id is not False:
-                committee.parent_id = parent_id
+            if parent_id is not False and parent_id != committee.parent_id:
+                self._lock_hierarchy(session)
+                self._move_subtree(session, committee_id=id, parent_id=parent_id)
+                changes.append(CommitteeChange(kind="moved", committee_id=id, parent_id=parent_id))
 
             session.commit()
             session.refresh(committee)
+            if name is not None or type_id is not None:
+                changes.append(self._committee_change("updated", committee))
+            self._record_committee_changes(changes)
             return committee
 
+    def move_committee_subtrees(self, moves: list[tuple[int, int | None]]) -> None:
+        """
+        Move several committees, each with its subcommittees, in one transaction. If any move is invalid, none are applied.
+
+        :param moves: (committee_id, new_parent_id) pairs, applied in order. A new_parent_id of None moves the committee to the top level.
+        :type moves: list[tuple[int, int | None]]
+        """
+        with self._committee_write_lock, self.db_client.get_session() as session:
+            self._lock_hierarchy(session)
+            for committee_id, parent_id in moves:
+                self._move_subtree(session, committee_id=committee_id, parent_id=parent_id)
+            session.commit()
+            self._record_committee_changes([CommitteeChange(kind="moved", committee_id=committee_id, parent_id=parent_id) for committee_id, parent_id in moves])
+
+    def merge_committees(self, source_id: int, target_id: int) -> None:
+        """
+        Merge the source committee into the target in one transaction. Subcommittees and memberships of the source are moved to the target,
+        memberships the target already has are dropped, and the source is deleted.
+
+        :param source_id: ID of the committee to merge and delete.
+        :type source_id: int
+        :param target_id: ID of the committee to keep.
+        :type target_id: int
+        """
+        if source_id == target_id:
+            raise ValueError("Committee cannot be merged into itself.")
+
+        with self._committee_write_lock, self.db_client.get_session() as session:
+            self._lock_hierarchy(session)
+            source = session.get(Committee, source_id)
+            if not source or not session.get(Committee, target_id):
+                raise ValueError("Committee not found.")
+
+            # Fails on the child whose subtree holds the target, if the target is below the source
+            child_ids = session.scalars(select(Committee.id).where(Committee.parent_id == source_id)).all()
+            for child_id in child_ids:
+                self._move_subtree(session, committee_id=child_id, parent_id=target_id)
+
+            session.execute(
+                pg_insert(CommitteeMembership)
+                .from_select(
+                    ["person_id", "role_id", "committee_id"],
+                    select(CommitteeMembership.person_id, CommitteeMembership.role_id, literal(target_id))
+                    .where(CommitteeMembership.committee_id == source_id),
+                )
+                .on_conflict_do_nothing()
+            )
+            session.execute(
+                delete(CommitteeMembership)
+                .where(CommitteeMembership.committee_id == source_id)
+                .execution_options(synchronize_session=False)
+            )
+
+            session.execute(
+                delete(CommitteeClosure)
+                .where(CommitteeClosure.descendant_id == source_id)
+                .execution_options(synchronize_session=False)
+            )
+            session.delete(source)
+            session.commit()
+
+            self._bump_membership_versions([source_id, target_id])
+            changes = [CommitteeChange(kind="moved", committee_id=child_id, parent_id=target_id) for child_id in child_ids]
+            changes.append(CommitteeChange(kind="deleted", committee_id=source_id))
+            self._record_committee_changes(changes)
+
+    def _lock_hierarchy(self, session) -> None:
+        """Serialize hierarchy changes until the transaction ends, so concurrent moves cannot pass each other's cycle checks."""
+        if self.db_client.db_type == 'postgresql':
+            session.execute(select(func.pg_advisory_xact_lock(HIERARCHY_LOCK_KEY)))
+
+    def _move_subtree(self, session, committee_id: int, parent_id: int | None) -> None:
+        """Move a committee and its subtree below parent_id, or to the top level if None. The cycle check is part of the UPDATE, so it sees the same rows as the move."""
+        stmt = update(Committee).where(Committee.id == committee_id)
+        if parent_id is not None:
+            stmt = stmt.where(
+                ~select(CommitteeClosure.ancestor_id)
+                .where(CommitteeClosure.ancestor_id == committee_id, CommitteeClosure.descendant_id == parent_id)
+                .exists()
+            )
+        moved = session.execute(stmt.values(parent_id=parent_id).returning(Committee.id)).first()
+        if moved is None:
+            if session.get(Committee, committee_id) is None:
+                raise ValueError("Committee not found.")
+            raise ValueError("Committee cannot be moved below itself or one of its subcommittees.")
+
+        self._detach_closure_subtree(session, committee_id=committee_id)
+        if parent_id is not None:
+            self._attach_closure_subtree(session, committee_id=committee_id, parent_id=parent_id)
+
     def update_committee_type(self, id: int, name: str) -> CommitteeType:
         """Update a committee type's name."""
         with self.db_client.get_session() as session:
@@ -324,6 +1053,8 @@ class MeddbData:
 
             committee_type.name = name
             session.commit()
+            self._invalidate_reference_data()
+            self._invalidate_committee_tree()
             session.refresh(committee_type)
             return committee_type
 
@@ -336,6 +1067,8 @@ class MeddbData:
 
             role.name = name
             session.commit()
+            self._invalidate_reference_data()
+            self._bump_membership_version()
             session.refresh(role)
             return role
 
@@ -354,6 +1087,8 @@ class MeddbData:
             if description:
                 union.description = description
             session.commit()
+            self._invalidate_reference_data()
+            self._bump_membership_version()
             session.refresh(union)
             return union
 
@@ -367,6 +1102,8 @@ class MeddbData:
 
             session.delete(committee_type)
             session.commit()
+            self._invalidate_reference_data()
+            self._invalidate_committee_tree()
 
     def delete_role(self, id: int) -> None:
         """Delete a role."""
@@ -377,6 +1114,8 @@ class MeddbData:
 
             session.delete(role)
             session.commit()
+            self._invalidate_reference_data()
+            self._bump_membership_version()
 
     def delete_union(self, union_id: int) -> None:
         """Delete a union."""
@@ -387,6 +1126,8 @@ class MeddbData:
 
             session.delete(union)
             session.commit()
+            self._invalidate_reference_data()
+            self._bump_membership_version()
 
     def delete_committee_member(self, committee_id: int, person_id: int, role_id: int) -> None:
         """Delete a committee membership. Also deletes the person if they have no other memberships."""
@@ -409,26 +1150,121 @@ class MeddbData:
                     session.delete(person)
 
             session.commit()
+            self._bump_membership_version(committee_id=committee_id)
+
+    def delete_committee_members(self, committee_id: int, members: list[tuple[int, int]]) -> int:
+        """
+        Delete several memberships of a committee in one transaction. Also deletes persons left without any memberships.
+
+        :param committee_id: ID of the committee.
+        :type committee_id: int
+        :param members: (person_id, role_id) pairs of the memberships to delete.
+        :type members: list[tuple[int, int]]
+        :return: Number of memberships deleted.
+        :rtype: int
+        """
+        if not members:
+            return 0
+
+        with self.db_client.get_session() as session:
+            deleted = self._delete_memberships(
+                session,
+                CommitteeMembership.committee_id == committee_id,
+                or_(*[
+                    (CommitteeMembership.person_id == person_id) & (CommitteeMembership.role_id == role_id)
+                    for person_id, role_id in members
+                ])
+            )
+            session.commit()
+            self._bump_membership_version(committee_id=committee_id)
+            return deleted
 
     def delete_committee(self, id: int) -> None:
         """Delete a committee and its memberships. Also deletes persons without other memberships and updates child committees to have no parent."""
-        with self.db_client.get_session() as session:
+        with self._committee_write_lock, self.db_client.get_session() as session:
+            self._lock_hierarchy(session)
             committee = session.get(Committee, id)
             if not committee:
                 raise ValueError("Committee not found.")
 
-            session.query(CommitteeMembership).filter_by(committee_id=id).delete()
-
-            persons_without_membership = (
-                session.query(Person)
-                .outerjoin(CommitteeMembership, Person.id == CommitteeMembership.person_id)
-                .filter(CommitteeMembership.person_id.is_(None))
-                .all()
+            self._delete_memberships(session, CommitteeMembership.committee_id == id)
+
+            child_ids = session.scalars(
+                update(Committee)
+                .where(Committee.parent_id == id)
+                .values(parent_id=None)
+                .returning(Committee.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            # Child subtrees become standalone trees
+            self._detach_closure_subtree(session, committee_id=id)
+            session.execute(
+                delete(CommitteeClosure)
+                .where(or_(CommitteeClosure.ancestor_id == id, CommitteeClosure.descendant_id == id))
+                .execution_options(synchronize_session=False)
             )
-            for person in persons_without_membership:
-                session.delete(person)
-
-            session.query(Committee).filter_by(parent_id=id).update({"parent_id": None})
 
             session.delete(committee)
             session.commit()
+            self._bump_membership_version(committee_id=id)
+            changes = [CommitteeChange(kind="moved", committee_id=child_id, parent_id=None) for child_id in child_ids]
+            changes.append(CommitteeChange(kind="deleted", committee_id=id))
+            self._record_committee_changes(changes)
+
+    def delete_committee_subtree(self, id: int) -> list[int]:
+        """
+        Delete a committee together with all its subcommittees and their memberships in one transaction. Also deletes persons without other memberships.
+
+        :param id: ID of the top committee of the subtree.
+        :type id: int
+        :return: IDs of the deleted committees.
+        :rtype: list[int]
+        """
+        with self._committee_write_lock, self.db_client.get_session() as session:
+            self._lock_hierarchy(session)
+            subtree_ids = list(session.scalars(
+                select(CommitteeClosure.descendant_id).where(CommitteeClosure.ancestor_id == id)
+            ))
+            if not subtree_ids:
+                raise ValueError("Committee not found.")
+
+            self._delete_memberships(session, CommitteeMembership.committee_id.in_(subtree_ids))
+
+            # Rows pairing an ancestor with a subtree committee, including all rows within the subtree
+            session.execute(
+                delete(CommitteeClosure)
+                .where(CommitteeClosure.descendant_id.in_(subtree_ids))
+                .execution_options(synchronize_session=False)
+            )
+            session.execute(
+                delete(Committee)
+                .where(Committee.id.in_(subtree_ids))
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+            self._bump_membership_versions(subtree_ids)
+            self._record_committee_changes([CommitteeChange(kind="deleted", committee_id=id)])
+        return subtree_ids
+
+    def _delete_memberships(self, session, *criteria) -> int:
+        """Delete the memberships matching criteria, then the persons among their members that have no memberships left. Returns the number of memberships deleted."""
+        removed_person_ids = session.scalars(
+            delete(CommitteeMembership)
+            .where(*criteria)
+            .returning(CommitteeMembership.person_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        person_ids = set(removed_person_ids)
+        if person_ids:
+            # Only the persons whose memberships were just removed can have become orphans
+            session.execute(
+                delete(Person)
+                .where(
+                    Person.id.in_(person_ids),
+                    ~select(CommitteeMembership.person_id).where(CommitteeMembership.person_id == Person.id).exists(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+        return len(removed_person_ids)
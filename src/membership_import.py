@@ -0,0 +1,96 @@
+"""Bulk import of committee memberships from CSV or Excel files, see MeddbData.bulk_import_memberships."""
+import os
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+import pandas as pd
+
+
+# Column names in import files, matching the committee member download plus the committee
+IMPORT_COLUMNS = {
+    "name": "Navn",
+    "email": "Email",
+    "committee": "Udvalg",
+    "role": "Rolle",
+    "organization": "Org. Enhed",
+    "union": "Fagforening",
+    "username": "Brugernavn",
+}
+REQUIRED_COLUMNS = ["name", "email", "committee", "role"]
+
+
+@dataclass
+class MembershipImportRow:
+    """A membership to import. row_number is the line in the file, counting the header as line 1."""
+    row_number: int
+    name: str
+    email: str
+    committee: str
+    role: str
+    organization: str | None = None
+    union: str | None = None
+    username: str | None = None
+
+
+@dataclass
+class MembershipImportError:
+    """A row that was not imported and why."""
+    row_number: int
+    message: str
+
+
+@dataclass
+class MembershipImportReport:
+    """Outcome of an import. With dry_run nothing is written, and the counts are the rows that would be imported."""
+    rows: int = 0
+    valid_rows: int = 0
+    persons_created: int = 0
+    persons_updated: int = 0
+    memberships_created: int = 0
+    memberships_existing: int = 0
+    dry_run: bool = False
+    errors: list[MembershipImportError] = field(default_factory=list)
+
+
+def read_membership_file(file: BinaryIO, file_name: str) -> list[MembershipImportRow]:
+    """
+    Read memberships from a CSV or Excel (.xlsx) file with the columns in IMPORT_COLUMNS. Column names are matched case-insensitively and optional columns may be left out.
+
+    :param file: The uploaded file.
+    :type file: BinaryIO
+    :param file_name: Name of the file, used to tell CSV and Excel apart.
+    :type file_name: str
+    :return: One row per non-empty line in the file.
+    :rtype: list[MembershipImportRow]
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == ".csv":
+        # sep=None sniffs the separator, Danish Excel writes CSV with semicolons. Blank lines are kept so row numbers match the file
+        df = pd.read_csv(file, sep=None, engine="python", dtype=str, keep_default_na=False, skip_blank_lines=False, encoding="utf-8-sig").fillna("")
+    elif extension == ".xlsx":
+        df = pd.read_excel(file, dtype=str, keep_default_na=False)
+    else:
+        raise ValueError(f"Unsupported file type: {extension or file_name}")
+
+    columns_by_name = {str(col).strip().lower(): col for col in df.columns}
+    file_columns = {key: columns_by_name.get(label.lower()) for key, label in IMPORT_COLUMNS.items()}
+    missing = [IMPORT_COLUMNS[key] for key in REQUIRED_COLUMNS if file_columns[key] is None]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    rows = []
+    for row_number, record in enumerate(df.to_dict(orient="records"), start=2):
+        values = {key: str(record[col]).strip() if col is not None else "" for key, col in file_columns.items()}
+        if not any(values.values()):
+            continue
+        rows.append(MembershipImportRow(
+            row_number=row_number,
+            name=values["name"],
+            email=values["email"],
+            committee=values["committee"],
+            role=values["role"],
+            organization=values["organization"] or None,
+            union=values["union"] or None,
+            username=values["username"] or None,
+        ))
+    return rows
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Integer, Unicode, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Integer, Unicode, ForeignKey, Index, PrimaryKeyConstraint, func, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from utils.config import DB_SCHEMA
@@ -22,7 +22,10 @@ class CommitteeType(Base):
 
 class Committee(Base):
     __tablename__ = "committee"
-    __table_args__ = {"schema": DB_SCHEMA}
+    __table_args__ = (
+        Index("ix_committee_parent_id", "parent_id"),
+        {"schema": DB_SCHEMA}
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(Unicode(100), nullable=False)
@@ -36,6 +39,20 @@ class Committee(Base):
     committee_memberships: Mapped[list["CommitteeMembership"]] = relationship(back_populates="committee")
 
 
+class CommitteeClosure(Base):
+    """Closure table of the committee hierarchy. Holds one row per ancestor/descendant pair, including each committee paired with itself at depth 0."""
+    __tablename__ = "committee_closure"
+    __table_args__ = (
+        PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+        Index("ix_committee_closure_descendant_id", "descendant_id", "ancestor_id"),
+        {"schema": DB_SCHEMA}
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey(f"{DB_SCHEMA}.committee.id", ondelete="CASCADE"))
+    descendant_id: Mapped[int] = mapped_column(ForeignKey(f"{DB_SCHEMA}.committee.id", ondelete="CASCADE"))
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
 class Union(Base):
     __tablename__ = "union"
     __table_args__ = {"schema": DB_SCHEMA}
@@ -49,7 +66,11 @@ class Union(Base):
 
 class Person(Base):
     __tablename__ = "person"
-    __table_args__ = {"schema": DB_SCHEMA}
+    __table_args__ = (
+        # Matches the "found_in_system IS NOT true" filter in get_persons_not_in_system
+        Index("ix_person_not_found_in_system", "id", postgresql_where=text("found_in_system IS NOT true")),
+        {"schema": DB_SCHEMA}
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     username: Mapped[str] = mapped_column(Unicode(100), nullable=True)
@@ -66,6 +87,10 @@ class Person(Base):
     committee_memberships: Mapped[list["CommitteeMembership"]] = relationship(back_populates="person")
 
 
+# Persons are looked up by email case-insensitively, and an email may only belong to one person
+Index("ix_person_email_lower", func.lower(Person.email), unique=True)
+
+
 class Role(Base):
     __tablename__ = "role"
     __table_args__ = {"schema": DB_SCHEMA}
@@ -80,6 +105,9 @@ class CommitteeMembership (Base):
     __tablename__ = "committee_membership"
     __table_args__ = (
         PrimaryKeyConstraint("person_id", "role_id", "committee_id"),
+        # The primary key starts with person_id, so lookups by committee or role need their own indexes
+        Index("ix_committee_membership_committee_id", "committee_id"),
+        Index("ix_committee_membership_role_id", "role_id"),
         {"schema": DB_SCHEMA}
     )
 
@@ -0,0 +1,102 @@
+"""Person search across Delta and Skole AD, querying both sources concurrently."""
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+
+from delta import DeltaClient
+from school_data import SchoolData
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PersonSearchResult:
+    """Merged search result. failed_sources names the sources that timed out or failed, in which case persons may be incomplete."""
+    persons: list[dict] = field(default_factory=list)
+    failed_sources: list[str] = field(default_factory=list)
+
+
+class PersonSearch:
+    """
+    Search for persons in Delta and Skole AD at the same time, so a search takes as long as the slowest source instead of their sum.
+    Results are merged in source order and de-duplicated by e-mail and username.
+    """
+    def __init__(self, delta_client: DeltaClient, school_data: SchoolData, delta_timeout: float, school_timeout: float, max_workers: int = 4):
+        """
+        Initialize the search service with its sources and a thread pool per source, so queries hanging in one source cannot hold up the other.
+
+        :param delta_client: Client for the Delta API.
+        :type delta_client: DeltaClient
+        :param school_data: Skole AD data access.
+        :type school_data: SchoolData
+        :param delta_timeout: Seconds to wait for Delta before returning without its results.
+        :type delta_timeout: float
+        :param school_timeout: Seconds to wait for Skole AD before returning without its results.
+        :type school_timeout: float
+        :param max_workers: Maximum number of concurrent queries per source across all sessions. Default is 4.
+        :type max_workers: int
+        """
+        self.delta_client = delta_client
+        self.school_data = school_data
+        self.timeouts = {
+            "Delta": delta_timeout,
+            "Skole AD": school_timeout,
+        }
+        self._executors = {
+            "Delta": ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="person-search-delta"),
+            "Skole AD": ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="person-search-skole-ad"),
+        }
+
+    def search(self, name: str | None = None, email: str | None = None) -> PersonSearchResult:
+        """
+        Search all sources by name and/or e-mail. At least one must be provided.
+        Persons are dictionaries with keys: 'Brugernavn', 'Navn', 'E-mail', 'Afdeling'.
+        """
+        if not name and not email:
+            raise ValueError("At least one search parameter (name, email) must be provided.")
+
+        started = time.monotonic()
+        futures: dict[str, Future] = {
+            # The request timeout frees the worker once the search has stopped waiting, instead of after the client's default timeout
+            "Delta": self._executors["Delta"].submit(self.delta_client.search, search_name=name, email=email, timeout=self.timeouts["Delta"]),
+            "Skole AD": self._executors["Skole AD"].submit(self.school_data.search_person, name=name, email=email),
+        }
+
+        result = PersonSearchResult()
+        for source, future in futures.items():
+            remaining = max(self.timeouts[source] - (time.monotonic() - started), 0)
+            try:
+                result.persons.extend(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                logger.warning(f"Person search in {source} timed out after {self.timeouts[source]} seconds")
+                result.failed_sources.append(source)
+            except Exception as e:
+                logger.error(f"Person search in {source} failed: {e}")
+                result.failed_sources.append(source)
+
+        result.persons = self._deduplicate(result.persons)
+        return result
+
+    @staticmethod
+    def _deduplicate(persons: list[dict]) -> list[dict]:
+        """Drop persons whose e-mail or username was already seen, keeping the first occurrence."""
+        seen_emails = set()
+        seen_usernames = set()
+        unique = []
+        for person in persons:
+            email = (person.get("E-mail") or "").strip().casefold()
+            username = (person.get("Brugernavn") or "").strip().casefold()
+            email = email if email not in ("", "-") else None
+            username = username if username not in ("", "-") else None
+
+            if (email and email in seen_emails) or (username and username in seen_usernames):
+                continue
+
+            if email:
+                seen_emails.add(email)
+            if username:
+                seen_usernames.add(username)
+            unique.append(person)
+        return unique
@@ -0,0 +1,75 @@
+"""Plain read models returned by MeddbData for pages and exports that do not need ORM objects."""
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PersonExportRow:
+    """A person in the "Dataudtræk" export with their roles and the sectors they are a member of."""
+    name: str
+    email: str | None
+    organization: str | None
+    found_in_system: bool
+    union_name: str | None
+    roles: list[str] = field(default_factory=list)
+    sectors: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class NamedItem:
+    """Anything offered in a select box by ID and name, e.g. a role, union, committee type or committee."""
+    id: int
+    name: str
+
+
+@dataclass
+class CommitteeMemberRow:
+    """A membership of a committee with the person, role and union names shown on the committee page."""
+    committee_id: int
+    person_id: int
+    role_id: int
+    name: str
+    email: str | None
+    organization: str | None
+    found_in_system: bool
+    role_name: str
+    union_name: str | None
+
+
+@dataclass
+class CommitteePage:
+    """
+    Everything the committee page shows, see MeddbData.load_committee_page.
+    roles, unions, committee_types and committees are only loaded when editing, and are empty otherwise.
+    """
+    id: int
+    name: str
+    type_id: int
+    type_name: str | None
+    parent_id: int | None
+    membership_version: tuple[int, int]
+    members: list[CommitteeMemberRow] = field(default_factory=list)
+    roles: list[NamedItem] = field(default_factory=list)
+    unions: list[NamedItem] = field(default_factory=list)
+    committee_types: list[NamedItem] = field(default_factory=list)
+    committees: list[NamedItem] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """
+    Snapshot of the small lookup tables offered in select boxes, roles, unions and committee types, each sorted by ID, with ID to name dictionaries.
+    Instances are shared between Streamlit sessions and must be treated as read-only by callers.
+    """
+    version: int
+    roles: tuple[NamedItem, ...] = ()
+    unions: tuple[NamedItem, ...] = ()
+    committee_types: tuple[NamedItem, ...] = ()
+    protected_committee_type_ids: frozenset[int] = frozenset()
+    role_names: dict[int, str] = field(init=False)
+    union_names: dict[int, str] = field(init=False)
+    committee_type_names: dict[int, str] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "role_names", {item.id: item.name for item in self.roles})
+        object.__setattr__(self, "union_names", {item.id: item.name for item in self.unions})
+        object.__setattr__(self, "committee_type_names", {item.id: item.name for item in self.committee_types})
@@ -1,25 +1,230 @@
+import bisect
 import logging
+import re
+import threading
+import time
 
 from sqlalchemy import text
 
 
 logger = logging.getLogger(__name__)
 
+# Search strategies, from fastest to slowest
+SEARCH_STRATEGY_TRIGRAM = "trigram"  # Name substring search uses a pg_trgm index, username and e-mail use expression indexes
+SEARCH_STRATEGY_EXPRESSION = "expression"  # Username and e-mail use expression indexes, name substring search scans the table
+SEARCH_STRATEGY_SEQUENTIAL = "sequential"  # No usable indexes, every search scans the table
+
+
+class SchoolPersonSnapshot:
+    """
+    In-memory copy of the Skole AD person table with lookup indexes, for searches that do not touch the database.
+    The table changes rarely, so a snapshot is reloaded only when PostgreSQL's table statistics show writes since it was taken.
+    """
+    def __init__(self, db_client, schema: str, max_age: float):
+        """
+        Initialize an empty snapshot. It is loaded by the first refresh.
+
+        :param db_client: Shared database client.
+        :type db_client: DatabaseClient
+        :param schema: Schema holding the person table.
+        :type schema: str
+        :param max_age: Seconds a snapshot is served before the table is checked for changes again.
+        :type max_age: float
+        """
+        self.db_client = db_client
+        self.schema = schema
+        self.max_age = max_age
+
+        self.checked_at: float | None = None
+        self._fingerprint = None
+        self._persons: list[dict] = []
+        self._by_username: dict[str, list[int]] = {}
+        self._by_email: dict[str, list[int]] = {}
+        # All lowercased names joined by newlines, with the start offset of each name, so substring search is a str.find over one string
+        self._names = ""
+        self._name_offsets: list[int] = []
+
+        self._refresh_lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        """Check whether the snapshot is loaded and was verified against the database within max_age seconds."""
+        return self.checked_at is not None and time.monotonic() - self.checked_at < self.max_age
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh on a background thread unless one is already running."""
+        if not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, name="skolead-snapshot-refresh", daemon=True).start()
+
+    def refresh(self) -> None:
+        """Reload the snapshot if the person table changed since it was taken, otherwise just mark it as verified."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            fingerprint = self._get_fingerprint()
+            if fingerprint is None or fingerprint != self._fingerprint or self.checked_at is None:
+                self._load()
+                self._fingerprint = fingerprint
+            self.checked_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error refreshing Skole AD snapshot: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def _get_fingerprint(self) -> tuple | None:
+        """Get the row count and write counters of the person table, or None if statistics are unavailable."""
+        if self.db_client.db_type != 'postgresql':
+            return None
+
+        with self.db_client.get_session() as session:
+            row = session.execute(
+                text("""
+                    SELECT n_live_tup, n_tup_ins, n_tup_upd, n_tup_del
+                    FROM pg_stat_user_tables
+                    WHERE schemaname = :schema AND relname = 'person'
+                """),
+                {"schema": self.schema}
+            ).first()
+            return tuple(row) if row else None
+
+    def _load(self) -> None:
+        """Load all persons and build the lookup indexes, then swap them in at once."""
+        with self.db_client.get_session() as session:
+            rows = session.execute(
+                text(f'SELECT "DQnummer", "Navn", "Mail", "Skole" FROM {self.schema}.person')
+            ).all()
+
+        persons = []
+        by_username: dict[str, list[int]] = {}
+        by_email: dict[str, list[int]] = {}
+        name_parts = []
+        name_offsets = []
+        offset = 0
+        for i, (username, name, email, school) in enumerate(rows):
+            persons.append({
+                "Brugernavn": username or "",
+                "Navn": name,
+                "E-mail": email,
+                "Afdeling": school or "",
+            })
+            if username:
+                by_username.setdefault(username.lower(), []).append(i)
+            if email:
+                by_email.setdefault(email.lower(), []).append(i)
+
+            lowered = (name or "").lower()
+            name_offsets.append(offset)
+            name_parts.append(lowered)
+            offset += len(lowered) + 1
+
+        self._persons, self._by_username, self._by_email = persons, by_username, by_email
+        self._names, self._name_offsets = "\n".join(name_parts), name_offsets
+        logger.info(f"Loaded Skole AD snapshot with {len(persons)} persons")
+
+    def search(self, username: str | None = None, name: str | None = None, email: str | None = None, limit: int = 10) -> list[dict]:
+        """Search the snapshot with the same matching rules as SchoolData.search_person."""
+        persons, names, name_offsets = self._persons, self._names, self._name_offsets
+
+        matches: list[int] = []
+        if username:
+            matches.extend(self._by_username.get(username.lower(), []))
+        if email:
+            matches.extend(self._by_email.get(email.lower(), []))
+        if name:
+            needle = name.lower()
+            position = names.find(needle)
+            while position != -1 and len(matches) < limit * 2:
+                index = bisect.bisect_right(name_offsets, position) - 1
+                matches.append(index)
+                # Continue after the current name, so each person is matched once
+                next_start = name_offsets[index + 1] if index + 1 < len(name_offsets) else len(names)
+                position = names.find(needle, next_start)
+
+        return [dict(persons[i]) for i in dict.fromkeys(matches)][:limit]
+
 
 class SchoolData:
     """
     Class to interact with the Skole AD database to search for person records.
     Schema and models assumed to be controlled externally.
     """
-    def __init__(self, db_client, schema):
-        """Initialize the SchoolData with a shared DatabaseClient and schema."""
+    def __init__(self, db_client, schema, create_search_indexes: bool = False, snapshot_max_age: float | None = None):
+        """
+        Initialize the SchoolData with a shared DatabaseClient and schema, and detect which search strategy the available indexes allow.
+
+        :param db_client: Shared database client.
+        :type db_client: DatabaseClient
+        :param schema: Schema holding the person table.
+        :type schema: str
+        :param create_search_indexes: Whether to try to create the pg_trgm extension and search indexes. Default is False, as the schema is controlled externally.
+        :type create_search_indexes: bool
+        :param snapshot_max_age: Serve searches from an in-memory snapshot of the person table, checked for changes every snapshot_max_age seconds. Default is None, which disables the snapshot.
+        :type snapshot_max_age: float | None
+        """
         self.db_client = db_client
         self.schema = schema
+        self.snapshot = SchoolPersonSnapshot(db_client=db_client, schema=schema, max_age=snapshot_max_age) if snapshot_max_age else None
+
+        if create_search_indexes:
+            self.create_search_indexes()
+
+        self.search_strategy = self.detect_search_strategy()
+        logger.info(f"Skole AD person search strategy: {self.search_strategy}")
+
+        if self.snapshot is not None:
+            self.snapshot.refresh_in_background()
+
+    def create_search_indexes(self) -> None:
+        """Try to create the indexes used by the faster search strategies. Failures, e.g. missing privileges, are logged and ignored."""
+        if self.db_client.db_type != 'postgresql':
+            return
+
+        statements = [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            f'CREATE INDEX IF NOT EXISTS ix_person_dqnummer_lower ON {self.schema}.person (LOWER("DQnummer"))',
+            f'CREATE INDEX IF NOT EXISTS ix_person_mail_lower ON {self.schema}.person (LOWER("Mail"))',
+            f'CREATE INDEX IF NOT EXISTS ix_person_navn_lower_trgm ON {self.schema}.person USING gin (LOWER("Navn") gin_trgm_ops)',
+        ]
+        for statement in statements:
+            with self.db_client.get_session() as session:
+                try:
+                    session.execute(text(statement))
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    logger.warning(f"Could not create Skole AD search index: {e}")
+
+    def detect_search_strategy(self) -> str:
+        """Determine the search strategy from the indexes that exist on the person table."""
+        if self.db_client.db_type != 'postgresql':
+            return SEARCH_STRATEGY_SEQUENTIAL
+
+        with self.db_client.get_session() as session:
+            try:
+                index_defs = session.execute(
+                    text("SELECT indexdef FROM pg_indexes WHERE schemaname = :schema AND tablename = 'person'"),
+                    {"schema": self.schema}
+                ).scalars().all()
+            except Exception as e:
+                logger.error(f"Error reading Skole AD indexes: {e}")
+                return SEARCH_STRATEGY_SEQUENTIAL
+
+        def _has_lower_index(column: str, trigram: bool = False) -> bool:
+            """Check for an index on LOWER(column), optionally a pg_trgm one. Varchar columns are shown with a text cast, e.g. lower(("Mail")::text)."""
+            pattern = re.compile(rf'lower\(\(?"{column}"', re.IGNORECASE)
+            return any(pattern.search(d) and (not trigram or "gin_trgm_ops" in d) for d in index_defs)
+
+        has_expression_indexes = _has_lower_index("DQnummer") and _has_lower_index("Mail")
+        if has_expression_indexes and _has_lower_index("Navn", trigram=True):
+            return SEARCH_STRATEGY_TRIGRAM
+        if has_expression_indexes:
+            return SEARCH_STRATEGY_EXPRESSION
+        return SEARCH_STRATEGY_SEQUENTIAL
 
     def search_person(self, username: str | None = None, name: str | None = None, email: str | None = None) -> dict:
         """
         Search for a person in the Skole AD database by username, name, or email. Must provide at least one parameter.
         Returns a list of dictionaries with keys: 'Brugernavn', 'Navn', 'E-mail', 'Afdeling'.
+        Served from the snapshot when it is enabled and fresh. Otherwise the database is queried, with the query shape following search_strategy, see detect_search_strategy.
         """
         search_clauses = []
         params = {}
@@ -35,12 +240,28 @@ class SchoolData:
         if not search_clauses:
             raise ValueError("At least one search parameter must be provided.")
 
-        ad_query = f"""
-            SELECT "DQnummer" as Brugernavn, "Navn", "Mail" as email, "Skole"
-            FROM {self.schema}.person
-            WHERE {' OR '.join(search_clauses)}
-            LIMIT 10
-        """
+        if self.snapshot is not None:
+            if self.snapshot.is_fresh():
+                return self.snapshot.search(username=username, name=name, email=email)
+            # Stale or not loaded yet, use the live query while the snapshot catches up
+            self.snapshot.refresh_in_background()
+
+        columns = f'SELECT "DQnummer" as Brugernavn, "Navn", "Mail" as email, "Skole" FROM {self.schema}.person'
+        if self.search_strategy == SEARCH_STRATEGY_SEQUENTIAL or len(search_clauses) == 1:
+            ad_query = f"""
+                {columns}
+                WHERE {' OR '.join(search_clauses)}
+                LIMIT 10
+            """
+        else:
+            # One branch per clause, so each can use its own index instead of the OR forcing a scan
+            branches = ' UNION '.join(f"({columns} WHERE {clause} LIMIT 10)" for clause in search_clauses)
+            ad_query = f"""
+                SELECT * FROM ({branches}) AS matches
+                LIMIT 10
+            """
+        logger.debug(f"Skole AD person search using strategy {self.search_strategy}")
+
         with self.db_client.get_session() as session:
             ad_result = session.execute(text(ad_query), params).mappings().all()
             ad_res = [
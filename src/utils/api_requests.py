@@ -1,6 +1,13 @@
 import time
 import base64
 import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+from utils.metrics import API_CONNECTIONS, API_REQUEST_SECONDS, TOKEN_REFRESHES, TOKEN_REFRESH_SECONDS
+from utils.token_manager import TokenManager
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +27,10 @@ class APIClient:
             password: str | None = None,
             cert_base64: str | None = None,
             use_bearer: bool | None = None,
-            add_auth_to_path: bool = True):
+            add_auth_to_path: bool = True,
+            pool_size: int = 10,
+            timeout: float | tuple[float, float] | None = 30,
+            token_refresh_margin: float = 60):
         """
         Initialize the APIClient with authentication parameters.
 
@@ -50,6 +60,12 @@ class APIClient:
         :type use_bearer: bool | None
         :param add_auth_to_path: Whether to add 'auth' to the authentication URL path. Default is True.
         :type add_auth_to_path: bool
+        :param pool_size: Maximum number of keep-alive connections kept per host. Default is 10.
+        :type pool_size: int
+        :param timeout: Default timeout in seconds for each request, as one value or a (connect, read) tuple. Can be overridden per request. Default is 30.
+        :type timeout: float | tuple[float, float] | None
+        :param token_refresh_margin: Seconds before expiry that client_id and client_secret tokens are refreshed in the background. Default is 60.
+        :type token_refresh_margin: float
         """
         self.base_url = base_url
         self.api_key = api_key
@@ -63,10 +79,6 @@ class APIClient:
         self.password = password
         self.use_bearer = use_bearer
 
-        self.access_token = None
-        self.refresh_token = None
-        self.token_expiry = None
-        self.refresh_token_expiry = None
         self.cert_data = None
 
         self.add_auth_to_path = add_auth_to_path
@@ -74,78 +86,127 @@ class APIClient:
         if cert_base64:
             self.cert_data = base64.b64decode(cert_base64)
 
+        self.timeout = timeout
+        self.request_count = 0
+        # Requests are made from many threads at once, and += is not atomic
+        self._request_count_lock = threading.Lock()
+        self._metrics_host = urlparse(base_url).hostname or base_url
+
+        # One session per client so connections (and TLS handshakes) are reused across requests and threads
+        self.session = requests.Session()
+        if self.cert_data:
+            from requests_pkcs12 import Pkcs12Adapter
+            adapter = Pkcs12Adapter(pkcs12_data=self.cert_data, pkcs12_password=self.password, pool_connections=pool_size, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._adapter = adapter
+        for state in ('opened', 'reused'):
+            API_CONNECTIONS.labels(host=self._metrics_host, state=state).set_function(lambda key=f'connections_{state}': self.get_connection_stats()[key])
+
+        # Tokens are fetched ahead of the first request and refreshed before they expire, see TokenManager
+        self._token_url = self._get_token_url()
+        self._token_manager = None
+        if not api_key and client_id and client_secret and self._token_url:
+            self._token_manager = TokenManager(
+                fetch_token=self._request_token,
+                host=urlparse(self._token_url).hostname or self._token_url,
+                refresh_margin=token_refresh_margin
+            )
+            self._token_manager.start()
+
+    def get_connection_stats(self) -> dict:
+        """
+        Get connection reuse statistics for the client's session.
+        Returns a dictionary with keys: 'requests' (requests made through make_request and authentication), 'connections_opened' (connections created by currently pooled hosts) and 'connections_reused'.
+        """
+        connections_opened = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+        return {
+            'requests': self.request_count,
+            'connections_opened': connections_opened,
+            'connections_reused': max(self.request_count - connections_opened, 0),
+        }
+
+    def _count_request(self) -> None:
+        """Count a request for get_connection_stats."""
+        with self._request_count_lock:
+            self.request_count += 1
+
+    def close(self):
+        """Close the session and its pooled connections, and stop refreshing tokens."""
+        if self._token_manager is not None:
+            self._token_manager.stop()
+        self.session.close()
+
+    def _get_token_url(self) -> str | None:
+        """Get the Keycloak or Azure token endpoint, or None if neither realm nor tenant_id is set."""
+        tmp_base_url = self.auth_url or self.base_url
+        if self.realm:
+            if self.add_auth_to_path:
+                return f'{tmp_base_url}/auth/realms/{self.realm}/protocol/openid-connect/token'
+            return f'{tmp_base_url}/realms/{self.realm}/protocol/openid-connect/token'
+        if self.tenant_id:
+            return f'{tmp_base_url}/{self.tenant_id}/oauth2/v2.0/token'
+        return None
+
+    def _request_token(self, refresh_token: str | None) -> dict:
+        """Request a token from the token endpoint, with the refresh token grant if refresh_token is given, and return the token response."""
+        tmp_headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+
+        tmp_json_data = {
+            'client_id': self.client_id,
+            'client_secret': self.client_secret
+        }
+
+        if self.tenant_id and self.scope:
+            tmp_json_data['scope'] = self.scope
+
+        if refresh_token:
+            tmp_json_data['grant_type'] = 'refresh_token'
+            tmp_json_data['refresh_token'] = refresh_token
+        elif self.username and self.password:
+            tmp_json_data['grant_type'] = 'password'
+            tmp_json_data['username'] = self.username
+            tmp_json_data['password'] = self.password
+        else:
+            tmp_json_data['grant_type'] = 'client_credentials'
+
+        self._count_request()
+        auth_host = urlparse(self._token_url).hostname or self._token_url
+        try:
+            with TOKEN_REFRESH_SECONDS.labels(host=auth_host).time():
+                response = self.session.post(self._token_url, headers=tmp_headers, data=tmp_json_data, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception:
+            TOKEN_REFRESHES.labels(host=auth_host, result="error").inc()
+            raise
+        TOKEN_REFRESHES.labels(host=auth_host, result=tmp_json_data['grant_type']).inc()
+        return response.json()
+
     def _authenticate(self):
         """Authenticate and return headers with the appropriate Authorization."""
         try:
-            import requests
             if self.api_key:
                 if self.use_bearer:
                     return {'Authorization': f'Bearer {self.api_key}'}
                 else:
                     return {'Authorization': f'{self.api_key}'}
             elif self.client_id and self.client_secret:
-                if not self.realm and not self.tenant_id:
+                if self._token_manager is None:
                     raise ValueError('realm or tenant_id is required for client_id and client_secret authentication')
 
-                refresh_token = False
-
-                if self.access_token:
-                    if self.token_expiry:
-                        if time.time() < self.token_expiry:
-                            return {'Authorization': f'Bearer {self.access_token}'}
-                        else:
-                            if self.refresh_token:
-                                if self.refresh_token_expiry:
-                                    if time.time() < self.refresh_token_expiry:
-                                        refresh_token = True
-
-                tmp_base_url = self.auth_url or self.base_url
-
-                if self.realm:
-                    if self.add_auth_to_path:
-                        tmp_url = f'{tmp_base_url}/auth/realms/{self.realm}/protocol/openid-connect/token'
-                    else:
-                        tmp_url = f'{tmp_base_url}/realms/{self.realm}/protocol/openid-connect/token'
-                elif self.tenant_id:
-                    tmp_url = f'{tmp_base_url}/{self.tenant_id}/oauth2/v2.0/token'
-
-                tmp_headers = {
-                    'Content-Type': 'application/x-www-form-urlencoded'
-                }
-
-                tmp_json_data = {
-                    'client_id': self.client_id,
-                    'client_secret': self.client_secret
-                }
-
-                if self.tenant_id and self.scope:
-                    tmp_json_data['scope'] = self.scope
-
-                if refresh_token:
-                    tmp_json_data['grant_type'] = 'refresh_token'
-                    tmp_json_data['refresh_token'] = self.refresh_token
-                if self.username and self.password:
-                    tmp_json_data['grant_type'] = 'password'
-                    tmp_json_data['username'] = self.username
-                    tmp_json_data['password'] = self.password
-                else:
-                    tmp_json_data['grant_type'] = 'client_credentials'
-
-                now = time.time()
-
-                response = requests.post(tmp_url, headers=tmp_headers, data=tmp_json_data)
-
-                response.raise_for_status()
-                data = response.json()
-
-                self.access_token = data['access_token']
-                self.token_expiry = now + data['expires_in']
-
-                if 'refresh_token' in data:
-                    self.refresh_token = data['refresh_token']
-                    self.refresh_token_expiry = now + data['refresh_expires_in']
-
-                return {'Authorization': f'Bearer {self.access_token}'}
+                access_token = self._token_manager.get_access_token()
+                if access_token is None:
+                    return {}
+                return {'Authorization': f'Bearer {access_token}'}
             elif self.username and self.password:
                 auth_str = f"{self.username}:{self.password}"
                 b64_auth_str = base64.b64encode(auth_str.encode()).decode()
@@ -162,13 +223,6 @@ class APIClient:
             if not isinstance(kwargs['path'], str) and kwargs['path'] is not None:
                 raise ValueError('Path must be a string')
 
-        if self.cert_data:
-            import requests_pkcs12 as requests
-            kwargs['pkcs12_data'] = self.cert_data
-            kwargs['pkcs12_password'] = self.password
-        else:
-            import requests
-
         if 'path' in kwargs:
             url = self.base_url.rstrip('/') + '/' + kwargs.pop('path').lstrip('/')
         else:
@@ -182,18 +236,26 @@ class APIClient:
             kwargs['headers'] = self._authenticate()
 
         if not any(ele in kwargs for ele in ['method', 'json', 'data', 'files']):
-            method = requests.get
+            method = 'GET'
         elif 'method' in kwargs:
-            method = getattr(requests, kwargs['method'].lower())
+            method = kwargs['method'].upper()
         else:
-            method = requests.post
+            method = 'POST'
 
         kwargs.pop('method', None)
+        kwargs.setdefault('timeout', self.timeout)
 
         if 'json' in kwargs:
             kwargs['headers']['Content-Type'] = 'application/json'
 
-        response = method(url, **kwargs)
+        self._count_request()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            API_REQUEST_SECONDS.labels(host=self._metrics_host, method=method, status="error").observe(time.perf_counter() - started)
+            raise
+        API_REQUEST_SECONDS.labels(host=self._metrics_host, method=method, status=str(response.status_code)).observe(time.perf_counter() - started)
 
         if response.status_code != 200:
             logger.info(response.content)
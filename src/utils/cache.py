@@ -0,0 +1,72 @@
+"""In-memory TTL/LRU cache shared between Streamlit sessions and threads, e.g. for Delta search results."""
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache where entries also expire after a fixed time to live.
+    Intended to be shared between Streamlit sessions through st.cache_resource objects.
+    Every method holds one lock for its whole read-modify-write, so concurrent gets and sets never corrupt the LRU order or the counters.
+    Values are stored and returned as is, not copied: callers must not modify them, or must copy them, as DeltaClient.search does.
+    Two threads missing the same key may both compute and set it; the last set wins.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize the cache.
+
+        :param maxsize: Maximum number of entries. The least recently used entry is evicted when full.
+        :type maxsize: int
+        :param ttl: Time to live for each entry in seconds.
+        :type ttl: float
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value for key, evicting the least recently used entry if the cache is full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a single entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Get cache statistics as a dictionary with keys: 'hits', 'misses', 'size', 'maxsize'."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
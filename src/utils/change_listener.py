@@ -0,0 +1,96 @@
+"""Background listener for PostgreSQL notifications, used to keep in-process caches consistent across replicas."""
+import logging
+import select
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeListener:
+    """
+    Thread that LISTENs on a PostgreSQL channel on its own connection and passes each notification payload to a callback.
+    Notifications sent while the connection is down are lost, so after reconnecting on_reconnect is called to let the caller drop everything it caches.
+    """
+    def __init__(self, connect, channel: str, on_notify, on_reconnect=None, keepalive_interval: float = 30, retry_interval: float = 5):
+        """
+        Initialize the listener. Call start to begin listening.
+
+        :param connect: Function returning a new psycopg2 connection, which the listener owns and closes.
+        :type connect: callable
+        :param channel: Notification channel to listen on.
+        :type channel: str
+        :param on_notify: Called with the payload of each notification, on the listener thread.
+        :type on_notify: callable
+        :param on_reconnect: Called after the connection was lost and listening has resumed. (optional)
+        :type on_reconnect: callable | None
+        :param keepalive_interval: Seconds without notifications after which the connection is checked with a query. Default is 30.
+        :type keepalive_interval: float
+        :param retry_interval: Seconds to wait before reconnecting after an error. Default is 5.
+        :type retry_interval: float
+        """
+        self.channel = channel
+        self.keepalive_interval = keepalive_interval
+        self.retry_interval = retry_interval
+        self._connect = connect
+        self._on_notify = on_notify
+        self._on_reconnect = on_reconnect
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Set once LISTEN has been issued, e.g. for callers that must not miss notifications right after start
+        self.listening = threading.Event()
+
+    def start(self) -> None:
+        """Start listening on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"listen-{self.channel}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop listening. The thread notices within keepalive_interval seconds, wait up to timeout seconds for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self.listening.set()
+                if connected_before and self._on_reconnect is not None:
+                    logger.info(f"Listening on {self.channel} again, notifications may have been missed")
+                    self._on_reconnect()
+                connected_before = True
+                self._listen(connection)
+            except Exception as e:
+                logger.warning(f"Lost connection listening on {self.channel}: {e}")
+            finally:
+                self.listening.clear()
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+            self._stop.wait(self.retry_interval)
+
+    def _listen(self, connection) -> None:
+        """Dispatch notifications until stopped. Raises if the connection fails."""
+        while not self._stop.is_set():
+            if select.select([connection], [], [], self.keepalive_interval) == ([], [], []):
+                # A half-open connection never becomes readable, a query detects it
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            else:
+                connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                try:
+                    self._on_notify(notification.payload)
+                except Exception as e:
+                    logger.error(f"Error handling notification on {self.channel}: {e}")
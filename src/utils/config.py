@@ -16,6 +16,11 @@ DELTA_CLIENT_ID = os.environ["DELTA_CLIENT_ID"].strip()
 DELTA_CLIENT_SECRET = os.environ["DELTA_CLIENT_SECRET"].strip()
 DELTA_REALM = '730'
 DELTA_AUTH_URL = "https://idp.opus-universe.kmd.dk"
+DELTA_POOL_SIZE = int(os.environ.get('DELTA_POOL_SIZE', 10))
+DELTA_TIMEOUT = float(os.environ.get('DELTA_TIMEOUT', 30))
+DELTA_SEARCH_CACHE_SIZE = int(os.environ.get('DELTA_SEARCH_CACHE_SIZE', 256))
+DELTA_SEARCH_CACHE_TTL = float(os.environ.get('DELTA_SEARCH_CACHE_TTL', 300))
+DELTA_SEARCH_TIMEOUT = float(os.environ.get('DELTA_SEARCH_TIMEOUT', 10))
 
 # Database
 DB_HOST = os.environ.get('DB_HOST')
@@ -24,6 +29,16 @@ DB_PASS = os.environ.get('DB_PASS')
 DB_NAME = os.environ.get('DB_NAME')
 DB_PORT = os.environ.get('DB_PORT')
 DB_SCHEMA = "meddb"
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds, replaces connections before server or firewall idle timeouts close them
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_STATEMENT_TIMEOUT = float(os.environ.get('DB_STATEMENT_TIMEOUT', 0)) or None  # seconds, 0 disables
+DB_UNIT_OF_WORK_ENABLED = os.environ.get('DB_UNIT_OF_WORK_ENABLED', 'False').lower() == 'true'  # one session and connection per page render, held for the whole render including API calls
+DB_CHANGE_NOTIFICATIONS_ENABLED = os.environ.get('DB_CHANGE_NOTIFICATIONS_ENABLED', 'True').lower() == 'true'  # keeps caches consistent across replicas with LISTEN/NOTIFY
+QUERY_PROFILING_ENABLED = os.environ.get('QUERY_PROFILING_ENABLED', 'False').lower() == 'true'
+SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.5))  # seconds
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 10))  # executions of one statement per rerun reported as a possible N+1 pattern
 
 # Skole AD Database - same db as main but different schema
 SKOLE_AD_DB_HOST = DB_HOST
@@ -32,6 +47,16 @@ SKOLE_AD_DB_PASS = DB_PASS
 SKOLE_AD_DB_NAME = DB_NAME
 SKOLE_AD_DB_PORT = DB_PORT
 SKOLE_AD_DB_SCHEMA = "skolead"
+SKOLE_AD_SEARCH_TIMEOUT = float(os.environ.get('SKOLE_AD_SEARCH_TIMEOUT', 5))
+SKOLE_AD_CREATE_SEARCH_INDEXES = os.environ.get('SKOLE_AD_CREATE_SEARCH_INDEXES', 'False').lower() == 'true'  # schema is controlled externally, so opt-in
+SKOLE_AD_SNAPSHOT_ENABLED = os.environ.get('SKOLE_AD_SNAPSHOT_ENABLED', 'False').lower() == 'true'
+SKOLE_AD_SNAPSHOT_MAX_AGE = float(os.environ.get('SKOLE_AD_SNAPSHOT_MAX_AGE', 900))  # seconds between change checks
+
+# Metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 9090))  # side port for Prometheus, separate from the Streamlit port
 
 XFLOW_URL = "https://randers.ditmerflex.dk/randers/Login/LoginFederated?returnUrl=/randers/Opret/8d089028bce28"
 PRIORITY_MEMBERS = ['Formand', 'Næstformand', 'Sekretær']
+COMMITTEE_SEARCH_MAX_RESULTS = 50  # buttons shown by "Søg udvalg"
+ROOT_COMMITTEE_ID = 1  # HOVEDUDVALG, all sectors are its direct children
@@ -1,11 +1,35 @@
 import logging
+import threading
+import time
 import urllib.parse
+from contextlib import contextmanager
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+
+from utils.metrics import DB_POOL_CHECKOUT_SECONDS
+
+
+class _UnitOfWorkSession:
+    """Context manager handing out the unit of work's session without closing it on exit, so the next caller on the thread reuses it."""
+    def __init__(self, session):
+        self.session = session
+
+    def __enter__(self):
+        return self.session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Leave the session usable for the rest of the unit of work, as closing it would
+            self.session.rollback()
+        return False
 
 
 class DatabaseClient:
-    def __init__(self, db_type: str, username: str, password: str, host: str, port: int | None = None, database: str | None = None):
+    def __init__(self, db_type: str, username: str, password: str, host: str, port: int | None = None, database: str | None = None,
+                 pool_size: int = 5, max_overflow: int = 10, pool_recycle: int = -1, pool_timeout: float = 30, statement_timeout: float | None = None):
         """
         Initialize the DatabaseClient with connection parameters.
 
@@ -21,6 +45,16 @@ class DatabaseClient:
         :type port: int | None
         :param database: Name of the database to connect to. (optional)
         :type database: str | None
+        :param pool_size: Number of connections kept open in the pool. Default is 5.
+        :type pool_size: int
+        :param max_overflow: Number of connections allowed beyond pool_size under load, closed again when returned. Default is 10.
+        :type max_overflow: int
+        :param pool_recycle: Seconds after which a connection is replaced on checkout, -1 to never replace. Default is -1.
+        :type pool_recycle: int
+        :param pool_timeout: Seconds to wait for a free connection before raising an error. Default is 30.
+        :type pool_timeout: float
+        :param statement_timeout: Seconds before the server cancels a statement, PostgreSQL only. Default is None, no timeout.
+        :type statement_timeout: float | None
         """
         self.db_type = db_type.lower()
         self.database = database
@@ -47,8 +81,28 @@ class DatabaseClient:
         if database:
             connection_string += f'/{urllib.parse.quote_plus(database)}'
 
-        self.engine = create_engine(connection_string, pool_pre_ping=True)
-        self.SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=self.engine))
+        self._connect_args = {}
+        if statement_timeout and self.db_type == 'postgresql':
+            self._connect_args['options'] = f'-c statement_timeout={int(statement_timeout * 1000)}'
+
+        self.engine = create_engine(
+            connection_string,
+            pool_pre_ping=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_timeout=pool_timeout,
+            connect_args=self._connect_args
+        )
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.SessionLocal = scoped_session(self.session_factory)
+        # The pool has no event before a checkout, so checkouts are timed from a session starting a transaction until it has its connection
+        event.listen(self.session_factory, "after_transaction_create", self._on_transaction_create)
+        event.listen(self.session_factory, "after_begin", self._on_begin)
+
+        # Units of work by thread ident, see start_unit_of_work
+        self._units_of_work: dict[int, tuple[threading.Thread, object, _UnitOfWorkSession]] = {}
+        self._units_of_work_lock = threading.Lock()
 
     def get_engine(self):
         """Get the SQLAlchemy engine."""
@@ -63,8 +117,90 @@ class DatabaseClient:
         except Exception as e:
             self.logger.error(f"Error connecting to database: {e}")
 
+    def get_dedicated_connection(self):
+        """Open a DBAPI connection outside the pool, for long-lived uses such as LISTEN that would otherwise hold a pooled connection forever. The caller closes it."""
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        cparams.update(self._connect_args)
+        return self.engine.dialect.connect(*cargs, **cparams)
+
+    def get_pool_status(self) -> dict:
+        """Get connection pool statistics as a dictionary with keys: 'size', 'checked_in', 'checked_out', 'overflow', 'units_of_work'."""
+        pool = self.engine.pool
+        return {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'units_of_work': len(self._units_of_work),
+        }
+
+    def start_unit_of_work(self) -> None:
+        """
+        Start a unit of work on the current thread: until end_unit_of_work, get_session returns one session bound to a single pooled connection, e.g. for one page render.
+        Sessions are not closed when their context exits, commits still commit. Prefer unit_of_work, which ends it however the block exits.
+        Units of work left open by threads that have finished without ending them are closed here.
+        """
+        self._close_finished_units_of_work()
+        if threading.get_ident() in self._units_of_work:
+            self.end_unit_of_work()
+
+        started = time.perf_counter()
+        connection = self.engine.connect()
+        DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+        session = self.session_factory(bind=connection)
+        with self._units_of_work_lock:
+            self._units_of_work[threading.get_ident()] = (threading.current_thread(), connection, _UnitOfWorkSession(session))
+
+    def end_unit_of_work(self) -> None:
+        """End the current thread's unit of work, rolling back anything not committed and returning its connection to the pool."""
+        with self._units_of_work_lock:
+            unit_of_work = self._units_of_work.pop(threading.get_ident(), None)
+        if unit_of_work is not None:
+            self._close_unit_of_work(unit_of_work)
+
+    @contextmanager
+    def unit_of_work(self):
+        """Run the block as a unit of work, see start_unit_of_work."""
+        self.start_unit_of_work()
+        try:
+            yield
+        finally:
+            self.end_unit_of_work()
+
+    def _close_finished_units_of_work(self) -> None:
+        """Close units of work whose threads have finished without ending them."""
+        with self._units_of_work_lock:
+            finished = [ident for ident, (thread, _, _) in self._units_of_work.items() if not thread.is_alive()]
+            units_of_work = [self._units_of_work.pop(ident) for ident in finished]
+        for unit_of_work in units_of_work:
+            self._close_unit_of_work(unit_of_work)
+
+    def _close_unit_of_work(self, unit_of_work) -> None:
+        """Close the session and return the connection of a unit of work."""
+        _, connection, session_context = unit_of_work
+        try:
+            session_context.session.close()
+            connection.close()
+        except Exception as e:
+            self.logger.error(f"Error closing unit of work: {e}")
+
+    def _on_transaction_create(self, session, transaction) -> None:
+        """Note when a session starts a transaction that will check out a connection. Unit of work sessions have theirs already, see start_unit_of_work."""
+        if transaction.parent is None and session.bind is self.engine:
+            session.info['checkout_started'] = time.perf_counter()
+
+    def _on_begin(self, session, transaction, connection) -> None:
+        """Record the checkout time once the session has its connection."""
+        started = session.info.pop('checkout_started', None)
+        if started is not None:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
     def get_session(self):
-        """Get a SQLAlchemy session."""
+        """Get a SQLAlchemy session, or the current thread's unit of work session, see start_unit_of_work."""
+        unit_of_work = self._units_of_work.get(threading.get_ident())
+        # Thread idents are reused, so check the unit of work belongs to this thread and not a finished one
+        if unit_of_work is not None and unit_of_work[0] is threading.current_thread():
+            return unit_of_work[2]
         try:
             return self.SessionLocal()
         except Exception as e:
@@ -0,0 +1,126 @@
+"""Prometheus metrics for database calls, API calls and page renders, served on a side port by start_metrics_server."""
+import functools
+import inspect
+import logging
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+
+logger = logging.getLogger(__name__)
+
+MEDDB_METHOD_SECONDS = Histogram(
+    "meddb_method_duration_seconds",
+    "Duration of MeddbData method calls.",
+    ["method"],
+)
+API_REQUEST_SECONDS = Histogram(
+    "meddb_api_request_duration_seconds",
+    "Duration of outgoing API requests by host, HTTP method and status code, or 'error' if no response was received.",
+    ["host", "method", "status"],
+)
+API_CONNECTIONS = Gauge(
+    "meddb_api_connections",
+    "HTTP connections of API clients by host: 'opened' is connections created for the currently pooled hosts, 'reused' is requests sent on an already open connection.",
+    ["host", "state"],
+)
+DELTA_SEARCH_SECONDS = Histogram(
+    "meddb_delta_search_duration_seconds",
+    "Duration of Delta person searches, by whether they were served from the search cache.",
+    ["cache"],
+)
+TOKEN_REFRESHES = Counter(
+    "meddb_token_refreshes_total",
+    "Access token requests by host and result, which is the grant type used or 'error'.",
+    ["host", "result"],
+)
+TOKEN_REFRESH_SECONDS = Histogram(
+    "meddb_token_refresh_duration_seconds",
+    "Duration of access token requests.",
+    ["host"],
+)
+TOKEN_WAIT_SECONDS = Histogram(
+    "meddb_token_wait_seconds",
+    "Time requests waited for an access token because there was no valid token, e.g. right after startup.",
+    ["host"],
+)
+TOKEN_EXPIRY_TIMESTAMP = Gauge(
+    "meddb_token_expiry_timestamp_seconds",
+    "Unix time at which the current access token expires.",
+    ["host"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "meddb_db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool, including opening new connections.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SCRIPT_RUN_SECONDS = Histogram(
+    "meddb_script_run_duration_seconds",
+    "Duration of Streamlit script runs, including runs ended early by st.stop(), st.rerun() or an error.",
+)
+SCRIPT_RUN_STATEMENTS = Histogram(
+    "meddb_script_run_statements",
+    "SQL statements per Streamlit script run. Only recorded when query profiling is enabled.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+def start_metrics_server(port: int) -> bool:
+    """
+    Serve the metrics over HTTP on port, once per process.
+
+    :param port: Port for the metrics endpoint.
+    :type port: int
+    :return: True if the server is running, False if it could not be started, e.g. because the port is in use.
+    :rtype: bool
+    """
+    global _server_started
+    with _server_lock:
+        if not _server_started:
+            try:
+                start_http_server(port)
+                _server_started = True
+                logger.info(f"Serving metrics on port {port}")
+            except OSError as e:
+                logger.warning(f"Could not start metrics server on port {port}: {e}")
+        return _server_started
+
+
+def instrument_methods(histogram: Histogram):
+    """
+    Class decorator recording the duration of every public method in histogram, labelled with the method name.
+    Generator methods are timed until the generator is exhausted or closed.
+    """
+    def decorator(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(func):
+                continue
+            setattr(cls, name, _timed_method(func, histogram.labels(method=name)))
+        return cls
+    return decorator
+
+
+def _timed_method(func, observer):
+    """Wrap func so each call is observed by observer."""
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                yield from func(*args, **kwargs)
+            finally:
+                observer.observe(time.perf_counter() - started)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observer.observe(time.perf_counter() - started)
+    return wrapper
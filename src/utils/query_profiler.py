@@ -0,0 +1,113 @@
+"""Opt-in SQL statement profiling on a SQLAlchemy engine: statement counts per Streamlit rerun, slow query log and N+1 detection."""
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryRunSummary:
+    """Statements executed during one run, e.g. a Streamlit rerun. repeated maps statements executed at least repeat_threshold times to their count."""
+    label: str
+    statements: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slow_statements: int = 0
+    repeated: dict[str, int] = field(default_factory=dict)
+
+
+class QueryProfiler:
+    """
+    Profile the statements executed on an engine using before/after_cursor_execute events.
+    Statements are counted per run on the thread that started it, so queries on other threads, e.g. search worker threads, are not included in a run.
+    Slow statements are logged on any thread, with parameter values redacted.
+    """
+    def __init__(self, engine, slow_query_threshold: float = 0.5, repeat_threshold: int = 10):
+        """
+        Attach the profiler to an engine.
+
+        :param engine: Engine to profile.
+        :type engine: sqlalchemy.engine.Engine
+        :param slow_query_threshold: Statements taking at least this many seconds are logged. Default is 0.5.
+        :type slow_query_threshold: float
+        :param repeat_threshold: A statement executed at least this many times in one run is reported as a possible N+1 pattern. Default is 10.
+        :type repeat_threshold: int
+        """
+        self.engine = engine
+        self.slow_query_threshold = slow_query_threshold
+        self.repeat_threshold = repeat_threshold
+        self.last_summary: QueryRunSummary | None = None
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def remove(self) -> None:
+        """Detach the profiler from the engine."""
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def start_run(self, label: str) -> None:
+        """Start counting statements on the current thread, ending a run still open on it first."""
+        if getattr(self._local, "run", None) is not None:
+            self.end_run()
+        self._local.run = QueryRunSummary(label=label)
+        self._local.counts = Counter()
+
+    def end_run(self) -> QueryRunSummary | None:
+        """End the current thread's run, log possible N+1 patterns and return its summary, or None if no run was started."""
+        run = getattr(self._local, "run", None)
+        if run is None:
+            return None
+        counts = self._local.counts
+        self._local.run = None
+        self._local.counts = None
+
+        run.repeated = {statement: count for statement, count in counts.most_common() if count >= self.repeat_threshold}
+        for statement, count in run.repeated.items():
+            logger.warning(f"Possible N+1 query in {run.label}: executed {count} times: {self._shorten(statement)}")
+        logger.debug(f"{run.label}: {run.statements} statements in {run.total_seconds:.3f} seconds")
+
+        self.last_summary = run
+        return run
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        if elapsed >= self.slow_query_threshold:
+            logger.warning(f"Slow query ({elapsed:.3f} seconds): {self._shorten(statement)} parameters: {self._redact(parameters)}")
+
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run.statements += 1
+            run.total_seconds += elapsed
+            run.slowest_seconds = max(run.slowest_seconds, elapsed)
+            run.slow_statements += elapsed >= self.slow_query_threshold
+            # Statements use bound parameters, so repeated lookups share the same text
+            self._local.counts[statement] += 1
+
+    @staticmethod
+    def _redact(parameters):
+        """Replace parameter values with their type names, so personal data such as names and e-mails is not logged."""
+        if isinstance(parameters, dict):
+            return {key: type(value).__name__ for key, value in parameters.items()}
+        if isinstance(parameters, (list, tuple)):
+            if parameters and isinstance(parameters[0], (dict, list, tuple)):
+                return f"<{len(parameters)} parameter sets>"
+            return [type(value).__name__ for value in parameters]
+        return type(parameters).__name__
+
+    @staticmethod
+    def _shorten(statement: str, max_length: int = 500) -> str:
+        """Collapse whitespace and truncate a statement for logging."""
+        statement = " ".join(statement.split())
+        return statement if len(statement) <= max_length else statement[:max_length] + "..."
@@ -0,0 +1,149 @@
+"""Proactive OAuth access token refresh on a background thread, used by APIClient."""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from utils.metrics import TOKEN_EXPIRY_TIMESTAMP, TOKEN_WAIT_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Token:
+    access_token: str
+    expires_at: float
+    refresh_at: float
+    refresh_token: str | None = None
+    refresh_expires_at: float | None = None
+
+
+class TokenManager:
+    """
+    Keeps an access token fresh on a daemon thread, so requests read the current token without waiting for the identity provider.
+    Only the thread requests tokens, which makes refreshes single-flight however many threads need a token. A token is refreshed refresh_margin
+    seconds before it expires, or halfway through its lifetime if that is shorter. Failed refreshes are retried with backoff while the old token is
+    still served. Callers only wait when there is no valid token at all, e.g. right after start or when the identity provider has been down until
+    the token expired.
+    """
+    def __init__(self, fetch_token, host: str, refresh_margin: float = 60, retry_interval: float = 5, max_retry_interval: float = 300, wait_timeout: float = 30):
+        """
+        Initialize the token manager. Call start to fetch the first token in the background.
+
+        :param fetch_token: Function requesting a token, called with a refresh token or None for a new grant. Returns the token response as a dict
+            with access_token and expires_in, and optionally refresh_token and refresh_expires_in.
+        :type fetch_token: callable
+        :param host: Identity provider host, used as metrics label and in log messages.
+        :type host: str
+        :param refresh_margin: Seconds before expiry to refresh the token. Default is 60.
+        :type refresh_margin: float
+        :param retry_interval: Seconds before the first retry of a failed refresh, doubled for each further failure. Default is 5.
+        :type retry_interval: float
+        :param max_retry_interval: Maximum seconds between retries. Default is 300.
+        :type max_retry_interval: float
+        :param wait_timeout: Maximum seconds get_access_token waits when there is no valid token. Default is 30.
+        :type wait_timeout: float
+        """
+        self.host = host
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.wait_timeout = wait_timeout
+        self._fetch_token = fetch_token
+        self._token: _Token | None = None
+        self._token_changed = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the refresh thread unless it is running."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"token-refresh-{self.host}", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the refresh thread."""
+        self._stop.set()
+        self._wake.set()
+
+    def get_access_token(self) -> str | None:
+        """
+        Get a valid access token. Returns immediately while the current token is valid, otherwise waits up to wait_timeout seconds for the refresh thread.
+
+        :return: The access token, or None if no valid token could be obtained in time.
+        :rtype: str | None
+        """
+        token = self._token
+        if token is not None and time.time() < token.expires_at:
+            return token.access_token
+
+        self.start()
+        self._wake.set()
+        started = time.perf_counter()
+        with self._token_changed:
+            self._token_changed.wait_for(self._has_valid_token, timeout=self.wait_timeout)
+        TOKEN_WAIT_SECONDS.labels(host=self.host).observe(time.perf_counter() - started)
+
+        token = self._token
+        if token is None or time.time() >= token.expires_at:
+            logger.error(f"No valid access token from {self.host} within {self.wait_timeout} seconds")
+            return None
+        return token.access_token
+
+    def _has_valid_token(self) -> bool:
+        return self._token is not None and time.time() < self._token.expires_at
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            token = self._token
+            if token is not None and time.time() < token.refresh_at:
+                # Woken early by a waiter only if the token expired meanwhile, e.g. after the machine was suspended
+                self._wake.wait(token.refresh_at - time.time())
+                self._wake.clear()
+                continue
+
+            try:
+                token = self._refresh(token)
+            except Exception as e:
+                failures += 1
+                delay = min(self.retry_interval * 2 ** (failures - 1), self.max_retry_interval)
+                logger.error(f"Error refreshing access token from {self.host}, retrying in {delay:.0f} seconds: {e}")
+                self._stop.wait(delay)
+                continue
+
+            failures = 0
+            with self._token_changed:
+                self._token = token
+                self._token_changed.notify_all()
+            TOKEN_EXPIRY_TIMESTAMP.labels(host=self.host).set(token.expires_at)
+
+    def _refresh(self, token: _Token | None) -> _Token:
+        """Get a new token, with the refresh token if it is still valid, falling back to a new grant if that fails."""
+        if token is not None and token.refresh_token and token.refresh_expires_at and time.time() < token.refresh_expires_at:
+            try:
+                return self._to_token(self._fetch_token(token.refresh_token), previous=token)
+            except Exception as e:
+                logger.warning(f"Refresh token rejected by {self.host}, requesting a new token: {e}")
+        return self._to_token(self._fetch_token(None), previous=None)
+
+    def _to_token(self, data: dict, previous: _Token | None) -> _Token:
+        """Build a token from a token response. Keeps the previous refresh token if the response has none."""
+        now = time.time()
+        expires_in = float(data['expires_in'])
+        refresh_token, refresh_expires_at = (previous.refresh_token, previous.refresh_expires_at) if previous is not None else (None, None)
+        if 'refresh_token' in data:
+            refresh_token = data['refresh_token']
+            refresh_expires_at = now + float(data['refresh_expires_in']) if 'refresh_expires_in' in data else None
+        return _Token(
+            access_token=data['access_token'],
+            expires_at=now + expires_in,
+            refresh_at=now + max(expires_in - self.refresh_margin, expires_in / 2),
+            refresh_token=refresh_token,
+            refresh_expires_at=refresh_expires_at,
+        )
@@ -0,0 +1,55 @@
+import unicodedata
+
+from committee_tree import CommitteeSearchIndex
+
+
+def index(*names):
+    roots = [{"label": name, "value": id, "children": []} for id, name in enumerate(names, start=1)]
+    return CommitteeSearchIndex(roots)
+
+
+def search(index, query):
+    return [node["label"] for node in index.search(query)]
+
+
+def test_normalize_casefolds_composes_and_collapses_whitespace():
+    decomposed = unicodedata.normalize("NFD", "Område")
+    assert CommitteeSearchIndex.normalize(f"  {decomposed}  NORD ") == "område nord"
+
+
+def test_decomposed_query_matches_composed_name():
+    assert search(index("Område Nord", "Skoler"), unicodedata.normalize("NFD", "område")) == ["Område Nord"]
+
+
+def test_ranks_exact_then_prefix_then_word_then_substring():
+    names = index("Skole", "Skoleudvalg", "MED Skole Nord", "Nord Skoleområde", "Folkeskole", "Andet")
+    assert search(names, "skole") == ["Skole", "Skoleudvalg", "MED Skole Nord", "Nord Skoleområde", "Folkeskole"]
+
+
+def test_words_match_in_any_order():
+    names = index("Sektor Børn og Unge", "Sektor Sundhed", "Unge")
+    assert search(names, "unge sekt") == ["Sektor Børn og Unge"]
+
+
+def test_word_match_starting_with_first_query_word_ranks_first():
+    names = index("Nord Sektor", "Sektor Nord")
+    assert search(names, "sektor nord") == ["Sektor Nord", "Nord Sektor"]
+
+
+def test_ties_sorted_by_name():
+    assert search(index("Udvalg C", "Udvalg A", "Udvalg B"), "udvalg") == ["Udvalg A", "Udvalg B", "Udvalg C"]
+
+
+def test_short_query_matches_substrings():
+    assert search(index("MED", "Område", "Andet"), "ed") == ["MED"]
+
+
+def test_blank_or_unmatched_query_returns_nothing():
+    names = index("Hovedudvalg")
+    assert search(names, "   ") == []
+    assert search(names, "xyz") == []
+
+
+def test_indexes_nested_nodes():
+    roots = [{"label": "Hovedudvalg", "value": 1, "children": [{"label": "Sektor A", "value": 2, "children": [{"label": "Lokal", "value": 3}]}]}]
+    assert [node["value"] for node in CommitteeSearchIndex(roots).search("lokal")] == [3]
@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+import pytest
+
+from committee_tree import CommitteeChange, CommitteeTree
+
+
+def committee(id, name, parent_id=None, type_name="Udvalg"):
+    return SimpleNamespace(id=id, name=name, parent_id=parent_id, type=SimpleNamespace(name=type_name))
+
+
+def build(committees, version=1):
+    return CommitteeTree.from_committees(committees=committees, version=version)
+
+
+def labels(nodes):
+    return [(node["label"], labels(node["children"])) if node.get("children") else node["label"] for node in nodes]
+
+
+@pytest.fixture
+def tree():
+    return build([
+        committee(1, "Hovedudvalg"),
+        committee(2, "Sektor B", 1),
+        committee(3, "Sektor A", 1),
+        committee(4, "Lokaludvalg", 2),
+        committee(5, "Arbejdsmiljø", 3),
+    ])
+
+
+def assert_same_as_rebuild(tree):
+    committees = [
+        committee(id, node["label"], tree.parent_map[id], node["className"])
+        for id, node in tree.node_map.items()
+    ]
+    rebuilt = build(committees, version=tree.version)
+    assert tree.roots == rebuilt.roots
+    assert tree.parent_map == rebuilt.parent_map
+
+
+def test_from_committees_sorts_parents_before_leaves(tree):
+    assert labels(tree.roots) == [("Hovedudvalg", [("Sektor A", ["Arbejdsmiljø"]), ("Sektor B", ["Lokaludvalg"])])]
+
+
+def test_apply_changes_leaves_original_untouched(tree):
+    before = labels(tree.roots)
+    updated = tree.apply_changes([CommitteeChange(kind="updated", committee_id=4, name="Zulu", type_name="Udvalg")], version=2)
+
+    assert updated.version == 2
+    assert labels(tree.roots) == before
+    assert tree.node_map[4]["label"] == "Lokaludvalg"
+    assert updated.node_map[4]["label"] == "Zulu"
+    # Untouched subtrees are shared between the snapshots
+    assert updated.node_map[5] is tree.node_map[5]
+
+
+def test_created_node_is_inserted_sorted(tree):
+    updated = tree.apply_changes([CommitteeChange(kind="created", committee_id=6, name="Sektor AA", type_name="Udvalg", parent_id=1)], version=2)
+
+    assert [node["label"] for node in updated.roots[0]["children"]] == ["Sektor A", "Sektor B", "Sektor AA"]
+    assert_same_as_rebuild(updated)
+
+
+def test_created_child_turns_leaf_into_parent(tree):
+    updated = tree.apply_changes([CommitteeChange(kind="created", committee_id=6, name="Underudvalg", type_name="Udvalg", parent_id=5)], version=2)
+
+    assert updated.node_map[5]["children"] == [updated.node_map[6]]
+    assert_same_as_rebuild(updated)
+
+
+def test_moved_subtree_leaves_empty_parent_as_leaf(tree):
+    updated = tree.apply_changes([CommitteeChange(kind="moved", committee_id=5, parent_id=2)], version=2)
+
+    assert labels(updated.roots) == [("Hovedudvalg", [("Sektor B", ["Arbejdsmiljø", "Lokaludvalg"]), "Sektor A"])]
+    assert updated.parent_map[5] == 2
+    assert_same_as_rebuild(updated)
+
+
+def test_deleted_removes_subtree(tree):
+    updated = tree.apply_changes([CommitteeChange(kind="deleted", committee_id=3)], version=2)
+
+    assert labels(updated.roots) == [("Hovedudvalg", [("Sektor B", ["Lokaludvalg"])])]
+    assert 3 not in updated.node_map and 5 not in updated.node_map
+    assert 5 not in updated.parent_map
+    assert_same_as_rebuild(updated)
+
+
+def test_changes_apply_in_order(tree):
+    updated = tree.apply_changes([
+        CommitteeChange(kind="created", committee_id=6, name="Ny", type_name="Udvalg", parent_id=4),
+        CommitteeChange(kind="updated", committee_id=6, name="Nyt navn", type_name="Udvalg"),
+        CommitteeChange(kind="moved", committee_id=4, parent_id=3),
+    ], version=2)
+
+    assert labels(updated.roots) == [("Hovedudvalg", [("Sektor A", [("Lokaludvalg", ["Nyt navn"]), "Arbejdsmiljø"]), "Sektor B"])]
+    assert_same_as_rebuild(updated)
+
+
+def test_created_is_idempotent(tree):
+    change = CommitteeChange(kind="created", committee_id=6, name="Ny", type_name="Udvalg", parent_id=1)
+    updated = tree.apply_changes([change, change], version=2)
+
+    assert [node["value"] for node in updated.roots[0]["children"]].count(6) == 1
+    assert_same_as_rebuild(updated)
+
+
+def test_changes_to_unknown_committees_are_ignored(tree):
+    updated = tree.apply_changes([
+        CommitteeChange(kind="updated", committee_id=99, name="X"),
+        CommitteeChange(kind="moved", committee_id=99, parent_id=1),
+        CommitteeChange(kind="deleted", committee_id=99),
+    ], version=2)
+
+    assert labels(updated.roots) == labels(tree.roots)
+
+
+def test_unknown_change_kind_raises(tree):
+    with pytest.raises(ValueError):
+        tree.apply_changes([CommitteeChange(kind="renamed", committee_id=1)], version=2)
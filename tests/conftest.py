@@ -0,0 +1,10 @@
+"""Test setup: the modules under test live in src and read their configuration from the environment on import."""
+import os
+import sys
+
+os.environ.setdefault("KEYCLOAK_URL", "http://keycloak.test")
+os.environ.setdefault("DELTA_URL", "http://delta.test")
+os.environ.setdefault("DELTA_CLIENT_ID", "test")
+os.environ.setdefault("DELTA_CLIENT_SECRET", "test")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from delta import DeltaClient
+from utils.token_manager import TokenManager
+
+
+def instance(name, email, department, username):
+    return {
+        "identity": {"name": name},
+        "inTypeRefs": [
+            {
+                "userKey": "APOS-Types-Engagement-TypeRelation-Person",
+                "targetObject": {
+                    "state": "STATE_ACTIVE",
+                    "attributes": [{"userKey": "APOS-Types-Engagement-Attribute-Email", "value": email}],
+                    "typeRefs": [{"userKey": "APOS-Types-Engagement-TypeRelation-AdmUnit", "targetObject": {"identity": {"name": department}}}],
+                },
+            },
+            {"userKey": "APOS-Types-User-TypeRelation-Person", "targetObject": {"identity": {"userKey": username}}},
+        ],
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No token requests to the identity provider, make_request is stubbed below
+    monkeypatch.setattr(TokenManager, "start", lambda self: None)
+    client = DeltaClient()
+    client.requests = []
+
+    def make_request(**kwargs):
+        client.requests.append(kwargs)
+        return {"graphQueryResult": [{"instances": [instance("Jens Hansen", "jens@example.dk", "Skole", "jh")]}]}
+
+    client.make_request = make_request
+    return client
+
+
+def criteria(request):
+    return json.loads(request["data"])["graphQueries"][0]["graphQuery"]["criteria"]
+
+
+def test_search_body_is_valid_json_with_the_criteria(client):
+    client.search(search_name="Jens", username="jh")
+
+    assert criteria(client.requests[0]) == {
+        "type": "AND",
+        "criteria": [
+            {"type": "MATCH", "operator": "LIKE", "left": {"source": "DEFINITION", "alias": "person.$name"}, "right": {"source": "STATIC", "value": "%Jens%"}},
+            {"type": "MATCH", "operator": "EQUAL", "left": {"source": "DEFINITION", "alias": "person.user.$userKey"}, "right": {"source": "STATIC", "value": "jh"}},
+        ],
+    }
+
+
+def test_search_body_template_is_not_changed_by_searches(client):
+    client.search(email="a@example.dk")
+    client.search(search_name="Jens")
+
+    assert [len(criteria(request)["criteria"]) for request in client.requests] == [1, 1]
+    assert "__CRITERIA__" not in client.requests[1]["data"]
+
+
+def test_search_parses_results(client):
+    assert client.search(search_name="Jens") == [
+        {"Navn": "Jens Hansen", "E-mail": "jens@example.dk", "Afdeling": "Skole", "Brugernavn": "jh"},
+    ]
+
+
+def test_search_cache_is_keyed_on_stripped_values(client):
+    first = client.search(search_name=" Jens ")
+    second = client.search(search_name="Jens")
+    client.search(search_name="Anne")
+
+    assert second == first
+    assert [criteria(request)["criteria"][0]["right"]["value"] for request in client.requests] == ["%Jens%", "%Anne%"]
+
+
+def test_cached_results_are_copies(client):
+    client.search(search_name="Jens")[0]["Navn"] = "Changed"
+
+    assert client.search(search_name="Jens")[0]["Navn"] == "Jens Hansen"
+
+
+def test_search_timeout_is_passed_to_the_request(client):
+    client.search(search_name="Jens", timeout=2)
+    client.search(search_name="Anne")
+
+    assert [request["timeout"] for request in client.requests] == [2, client.timeout]
+
+
+def test_search_requires_a_parameter(client):
+    with pytest.raises(ValueError):
+        client.search(search_name="  ")
+    assert client.requests == []
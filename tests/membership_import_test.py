@@ -0,0 +1,69 @@
+import io
+
+import openpyxl
+import pytest
+
+from membership_import import MembershipImportRow, read_membership_file
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode("utf-8-sig"))
+
+
+def xlsx_file(rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    file = io.BytesIO()
+    workbook.save(file)
+    file.seek(0)
+    return file
+
+
+@pytest.mark.parametrize("separator", [";", ","])
+def test_reads_csv_with_either_separator(separator):
+    text = separator.join(["Navn", "Email", "Udvalg", "Rolle", "Fagforening"]) + "\n"
+    text += separator.join(["Jens Hansen", "jens@example.dk", "Lokaludvalg", "Formand", "FOA"]) + "\n"
+
+    assert read_membership_file(csv_file(text), file_name="import.csv") == [
+        MembershipImportRow(row_number=2, name="Jens Hansen", email="jens@example.dk", committee="Lokaludvalg", role="Formand", union="FOA"),
+    ]
+
+
+def test_matches_columns_case_insensitively_and_strips_values():
+    text = "navn;EMAIL;Udvalg;rolle;Brugernavn\n Jens ; jens@example.dk ;Lokaludvalg;Medlem;\n"
+
+    row, = read_membership_file(csv_file(text), file_name="IMPORT.CSV")
+    assert (row.name, row.email, row.username, row.organization) == ("Jens", "jens@example.dk", None, None)
+
+
+def test_blank_rows_are_skipped_and_row_numbers_match_the_file():
+    text = "Navn;Email;Udvalg;Rolle\nA;a@example.dk;U;R\n\n;;;\nB;b@example.dk;U;R\n"
+
+    rows = read_membership_file(csv_file(text), file_name="import.csv")
+    assert [(row.row_number, row.name) for row in rows] == [(2, "A"), (5, "B")]
+
+
+def test_missing_required_column_raises():
+    text = "Navn;Udvalg;Rolle\nA;U;R\n"
+
+    with pytest.raises(ValueError, match="Email"):
+        read_membership_file(csv_file(text), file_name="import.csv")
+
+
+def test_reads_xlsx():
+    file = xlsx_file([
+        ["Navn", "Email", "Udvalg", "Rolle", "Org. Enhed"],
+        ["A", "a@example.dk", "U", "R", "Skole"],
+        [],
+        ["B", "b@example.dk", "U", "R", None],
+    ])
+
+    rows = read_membership_file(file, file_name="import.xlsx")
+    assert [(row.row_number, row.name, row.organization) for row in rows] == [(2, "A", "Skole"), (4, "B", None)]
+
+
+@pytest.mark.parametrize("file_name", ["import.xls", "import.txt", "import"])
+def test_unsupported_file_type_raises(file_name):
+    with pytest.raises(ValueError, match="Unsupported file type"):
+        read_membership_file(csv_file("Navn;Email;Udvalg;Rolle\n"), file_name=file_name)
@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+from person_search import PersonSearch
+
+
+def person(name, email, username="-", department="-"):
+    return {"Brugernavn": username, "Navn": name, "E-mail": email, "Afdeling": department}
+
+
+class StubDelta:
+    def __init__(self, persons=(), error=None, release=None):
+        self.persons = list(persons)
+        self.error = error
+        self.release = release
+        self.calls = []
+
+    def search(self, search_name=None, email=None, timeout=None):
+        self.calls.append((search_name, email, timeout))
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return list(self.persons)
+
+
+class StubSchoolData:
+    def __init__(self, persons=(), error=None, release=None):
+        self.persons = list(persons)
+        self.error = error
+        self.release = release
+
+    def search_person(self, name=None, email=None):
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return list(self.persons)
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    # Lets blocked stub sources finish, so no worker threads are left waiting
+    event.set()
+
+
+def test_merges_sources_in_order():
+    delta = StubDelta([person("Jens", "jens@example.dk", "jh")])
+    school = StubSchoolData([person("Anne", "anne@skole.dk", "ab")])
+
+    result = PersonSearch(delta, school, delta_timeout=1, school_timeout=1).search(name="a")
+
+    assert [p["Navn"] for p in result.persons] == ["Jens", "Anne"]
+    assert result.failed_sources == []
+
+
+def test_passes_search_timeout_to_delta():
+    delta = StubDelta()
+
+    PersonSearch(delta, StubSchoolData(), delta_timeout=3, school_timeout=1).search(email="a@example.dk")
+
+    assert delta.calls == [(None, "a@example.dk", 3)]
+
+
+def test_duplicates_across_sources_are_merged():
+    delta = StubDelta([person("Jens Hansen", "Jens@Example.dk", "jh")])
+    school = StubSchoolData([
+        person("Jens Hansen", " jens@example.dk ", "-"),
+        person("J. Hansen", "-", "JH"),
+        person("Anne", "-", "-"),
+        person("Bo", "-", "-"),
+    ])
+
+    result = PersonSearch(delta, school, delta_timeout=1, school_timeout=1).search(name="hansen")
+
+    # Missing e-mails and usernames ("-") never count as duplicates
+    assert [p["Navn"] for p in result.persons] == ["Jens Hansen", "Anne", "Bo"]
+
+
+def test_slow_source_times_out_while_the_other_returns(release):
+    delta = StubDelta([person("Jens", "jens@example.dk")], release=release)
+    school = StubSchoolData([person("Anne", "anne@skole.dk")])
+
+    result = PersonSearch(delta, school, delta_timeout=0.2, school_timeout=1).search(name="a")
+
+    assert [p["Navn"] for p in result.persons] == ["Anne"]
+    assert result.failed_sources == ["Delta"]
+
+
+def test_failing_source_is_reported_while_the_other_returns():
+    delta = StubDelta([person("Jens", "jens@example.dk")])
+    school = StubSchoolData(error=RuntimeError("database down"))
+
+    result = PersonSearch(delta, school, delta_timeout=1, school_timeout=1).search(name="a")
+
+    assert [p["Navn"] for p in result.persons] == ["Jens"]
+    assert result.failed_sources == ["Skole AD"]
+
+
+def test_hung_source_does_not_block_the_other_sources_pool(release):
+    delta = StubDelta(release=release)
+    school = StubSchoolData([person("Anne", "anne@skole.dk")])
+    search = PersonSearch(delta, school, delta_timeout=0.05, school_timeout=1, max_workers=1)
+
+    for _ in range(3):
+        result = search.search(name="a")
+        assert [p["Navn"] for p in result.persons] == ["Anne"]
+
+
+def test_requires_a_search_parameter():
+    with pytest.raises(ValueError):
+        PersonSearch(StubDelta(), StubSchoolData(), delta_timeout=1, school_timeout=1).search()
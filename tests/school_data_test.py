@@ -0,0 +1,136 @@
+import pytest
+
+from school_data import SchoolPersonSnapshot
+
+
+class StubResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return list(self.rows)
+
+
+class StubSession:
+    def __init__(self, db_client):
+        self.db_client = db_client
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params=None):
+        if "pg_stat_user_tables" in str(statement):
+            fingerprint = self.db_client.fingerprint
+            return StubResult([fingerprint] if fingerprint is not None else [])
+        self.db_client.loads += 1
+        return StubResult(self.db_client.persons)
+
+
+class StubDatabaseClient:
+    """Serves the person table and its statistics fingerprint, counting full loads."""
+    db_type = "postgresql"
+
+    def __init__(self, persons):
+        self.persons = persons
+        self.fingerprint = (len(persons), len(persons), 0, 0)
+        self.loads = 0
+
+    def get_session(self):
+        return StubSession(self)
+
+
+PERSONS = [
+    ("DQ1", "Jens Hansen", "jens@skole.dk", "Nord Skole"),
+    ("DQ2", "Anne Jensen", "Anne@Skole.dk", "Syd Skole"),
+    ("DQ3", "Bo Hansen", None, None),
+]
+
+
+@pytest.fixture
+def db_client():
+    return StubDatabaseClient(list(PERSONS))
+
+
+@pytest.fixture
+def snapshot(db_client):
+    snapshot = SchoolPersonSnapshot(db_client, schema="skolead", max_age=60)
+    snapshot.refresh()
+    return snapshot
+
+
+def names(persons):
+    return [person["Navn"] for person in persons]
+
+
+def test_refresh_loads_the_table(snapshot, db_client):
+    assert snapshot.is_fresh()
+    assert db_client.loads == 1
+
+
+def test_unchanged_fingerprint_does_not_reload(snapshot, db_client):
+    snapshot.refresh()
+    snapshot.refresh()
+
+    assert db_client.loads == 1
+    assert snapshot.is_fresh()
+
+
+def test_changed_fingerprint_reloads(snapshot, db_client):
+    db_client.persons.append(("DQ4", "Ny Person", "ny@skole.dk", "Nord Skole"))
+    db_client.fingerprint = (4, 4, 0, 0)
+    snapshot.refresh()
+
+    assert db_client.loads == 2
+    assert names(snapshot.search(name="ny")) == ["Ny Person"]
+
+
+def test_missing_statistics_always_reload(snapshot, db_client):
+    db_client.fingerprint = None
+    snapshot.refresh()
+    snapshot.refresh()
+
+    assert db_client.loads == 3
+
+
+def test_failed_refresh_keeps_the_snapshot_unverified(db_client):
+    def get_session():
+        raise RuntimeError("database down")
+
+    db_client.get_session = get_session
+    snapshot = SchoolPersonSnapshot(db_client, schema="skolead", max_age=60)
+    snapshot.refresh()
+
+    assert not snapshot.is_fresh()
+
+
+def test_search_by_name_is_case_insensitive_substring(snapshot):
+    assert names(snapshot.search(name="HANSEN")) == ["Jens Hansen", "Bo Hansen"]
+    assert names(snapshot.search(name="jens")) == ["Jens Hansen", "Anne Jensen"]
+
+
+def test_search_by_username_and_email_is_exact_and_case_insensitive(snapshot):
+    assert names(snapshot.search(username="dq2")) == ["Anne Jensen"]
+    assert names(snapshot.search(email="anne@skole.dk")) == ["Anne Jensen"]
+    assert snapshot.search(email="anne@skole") == []
+
+
+def test_search_returns_each_person_once_in_the_database_format(snapshot):
+    assert snapshot.search(username="DQ3", name="bo") == [
+        {"Brugernavn": "DQ3", "Navn": "Bo Hansen", "E-mail": None, "Afdeling": ""},
+    ]
+
+
+def test_search_limits_results(snapshot):
+    assert names(snapshot.search(name="e", limit=2)) == ["Jens Hansen", "Anne Jensen"]
+
+
+def test_search_results_are_copies(snapshot):
+    snapshot.search(username="DQ1")[0]["Navn"] = "Changed"
+
+    assert names(snapshot.search(username="DQ1")) == ["Jens Hansen"]
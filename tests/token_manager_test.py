@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from utils.token_manager import TokenManager
+
+
+class FakeIdentityProvider:
+    """Token endpoint counting its calls, which can be made slow or failing."""
+    def __init__(self, expires_in=300, delay=0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.fail = False
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch_token(self, refresh_token):
+        with self._lock:
+            self.calls.append(refresh_token)
+            number = len(self.calls)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("identity provider down")
+        return {
+            'access_token': f"token-{number}",
+            'expires_in': self.expires_in,
+            'refresh_token': f"refresh-{number}",
+            'refresh_expires_in': 3600,
+        }
+
+
+@pytest.fixture
+def managers():
+    started = []
+
+    def make(idp, **kwargs):
+        manager = TokenManager(fetch_token=idp.fetch_token, host="idp.test", **kwargs)
+        started.append(manager)
+        return manager
+
+    yield make
+    for manager in started:
+        manager.stop()
+
+
+def test_concurrent_callers_share_one_token_request(managers):
+    idp = FakeIdentityProvider(delay=0.2)
+    manager = managers(idp, wait_timeout=5)
+    tokens = []
+
+    def get():
+        tokens.append(manager.get_access_token())
+
+    threads = [threading.Thread(target=get) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ["token-1"] * 20
+    assert idp.calls == [None]
+
+
+def test_valid_token_is_returned_without_requests(managers):
+    idp = FakeIdentityProvider()
+    manager = managers(idp, wait_timeout=5)
+    assert manager.get_access_token() == "token-1"
+    assert manager.get_access_token() == "token-1"
+    assert idp.calls == [None]
+
+
+def test_token_is_refreshed_before_it_expires_with_the_refresh_token(managers):
+    idp = FakeIdentityProvider(expires_in=0.4)
+    manager = managers(idp, refresh_margin=60, wait_timeout=5)
+    assert manager.get_access_token() == "token-1"
+
+    # Refreshed halfway through the lifetime, as the margin is longer than the token lives
+    deadline = time.monotonic() + 5
+    while len(idp.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert idp.calls[:2] == [None, "refresh-1"]
+
+
+def test_failed_refresh_keeps_serving_the_old_token(managers):
+    idp = FakeIdentityProvider(expires_in=1)
+    manager = managers(idp, refresh_margin=60, retry_interval=0.05, max_retry_interval=0.05, wait_timeout=5)
+    assert manager.get_access_token() == "token-1"
+
+    idp.fail = True
+    deadline = time.monotonic() + 5
+    while len(idp.calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.get_access_token() == "token-1"
+
+
+def test_returns_none_when_no_token_can_be_obtained(managers):
+    idp = FakeIdentityProvider()
+    idp.fail = True
+    manager = managers(idp, retry_interval=0.05, max_retry_interval=0.05, wait_timeout=0.2)
+    assert manager.get_access_token() is None
@@ -0,0 +1,89 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import cache
+from utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_get_returns_value_until_it_expires(clock):
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("a", 1)
+
+    clock.now += 60
+    assert c.get("a") == 1
+    clock.now += 0.001
+    assert c.get("a", "missing") == "missing"
+    assert c.stats() == {'hits': 1, 'misses': 1, 'size': 0, 'maxsize': 10}
+
+
+def test_set_restarts_the_time_to_live(clock):
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("a", 1)
+    clock.now += 50
+    c.set("a", 2)
+    clock.now += 50
+    assert c.get("a") == 2
+
+
+def test_evicts_least_recently_used(clock):
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+
+    assert c.get("b") is None
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+
+
+def test_set_of_existing_key_counts_as_use(clock):
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.set("a", 3)
+    c.set("c", 4)
+
+    assert c.get("b") is None
+    assert c.get("a") == 3
+
+
+def test_invalidate_and_clear(clock):
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.invalidate("a")
+    c.invalidate("missing")
+    assert c.get("a") is None
+    assert c.get("b") == 2
+
+    c.clear()
+    assert c.stats()['size'] == 0
+
+
+def test_concurrent_use_keeps_size_and_counters_consistent():
+    c = TTLCache(maxsize=50, ttl=60)
+
+    def work(offset):
+        for i in range(2000):
+            c.set((offset + i) % 100, i)
+            c.get((offset + i * 7) % 100)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = c.stats()
+    assert stats['size'] == 50
+    assert stats['hits'] + stats['misses'] == 8 * 2000